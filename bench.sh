@@ -0,0 +1,3 @@
+#!/usr/bin/bash
+
+cd src && python3 bench_inline.py && python3 bench_blocks.py && python3 bench_html.py && python3 bench_memory.py && python3 bench_props.py && python3 bench_escape.py && python3 bench_render_cache.py && python3 bench_lists.py && python3 bench_build.py && python3 bench_static_sync.py && python3 bench_watch.py
@@ -0,0 +1,274 @@
+import marshal
+from array import array
+
+from htmlnode import (
+    ATTRIBUTE_ESCAPES,
+    SELF_CLOSING_TAGS,
+    LeafNode,
+    ParentNode,
+    SafeString,
+    _escape_text,
+)
+
+NONE = -1  # Missing index: no parent, child, sibling or value
+# Bump when the layout written by DocumentArena.to_bytes changes
+FORMAT_VERSION = 1
+
+
+class DocumentArena:
+    """
+    A document stored as parallel arrays instead of one object per node.
+
+    Node i is described by tags[i] (an index into tag_names, 0 for plain
+    text), values[i] (an index into strings), parents[i], first_child[i]
+    and next_sibling[i], and its props, the (name, value) string index
+    pairs prop_items[prop_offsets[i] : prop_offsets[i + 1]]. Tags, values
+    and props are interned, so repeated text is stored once.
+
+    Nodes are appended in document order, parents before their children.
+    to_html renders straight from the arrays; to_node and add_node convert
+    to and from HTMLNode trees for code that needs the object model.
+    to_bytes and from_bytes store a document as little more than its
+    arrays' raw bytes.
+    """
+
+    # Every array field, in the order to_bytes writes them
+    ARRAYS = (
+        "tags",
+        "values",
+        "parents",
+        "first_child",
+        "next_sibling",
+        "is_parent",
+        "prop_offsets",
+        "prop_items",
+        "_last_child",
+    )
+
+    def __init__(self):
+        self.tags = array("i")
+        self.values = array("i")
+        self.parents = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.is_parent = array("b")
+        self.prop_offsets = array("i", [0])
+        self.prop_items = array("i")
+        self.tag_names = [None]
+        self.strings = []
+        self._last_child = array("i")
+        self._tag_ids = {None: 0}
+        # SafeStrings compare equal to plain strings, so they get their own
+        # table to keep them from being escaped, or text from not being
+        self._string_ids = {}
+        self._safe_string_ids = {}
+
+    def __len__(self):
+        return len(self.tags)
+
+    def _intern(self, text):
+        ids = self._safe_string_ids if type(text) is SafeString else self._string_ids
+        index = ids.get(text)
+        if index is None:
+            index = ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def add(self, tag, value=None, props=None, parent=NONE, is_parent=False):
+        """Append a node as the last child of parent and return its index."""
+        # As LeafNode checks: a leaf stored without a value would render
+        # whatever string happens to be last in the table
+        if value is None and not is_parent and tag not in SELF_CLOSING_TAGS:
+            raise ValueError("value is required for non-self-cloding tags")
+        index = len(self.tags)
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+        self.tags.append(tag_id)
+        self.values.append(NONE if value is None else self._intern(value))
+        self.parents.append(parent)
+        self.first_child.append(NONE)
+        self.next_sibling.append(NONE)
+        self._last_child.append(NONE)
+        self.is_parent.append(is_parent)
+        if props:
+            for name, prop_value in props.items():
+                self.prop_items.append(self._intern(name))
+                self.prop_items.append(self._intern(prop_value))
+        self.prop_offsets.append(len(self.prop_items))
+        if parent != NONE:
+            previous = self._last_child[parent]
+            if previous == NONE:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[previous] = index
+            self._last_child[parent] = index
+        return index
+
+    def add_node(self, node, parent=NONE):
+        """
+        Append an HTMLNode tree under parent and return the index of its
+        root. Nodes other than LeafNode and ParentNode are stored as their
+        rendered HTML.
+        """
+        root = NONE
+        pending = [(node, parent)]
+        while pending:
+            node, parent = pending.pop()
+            if isinstance(node, ParentNode):
+                index = self.add(node.tag, None, node.props, parent, True)
+                pending.extend((child, index) for child in reversed(node.children))
+            elif isinstance(node, LeafNode):
+                index = self.add(node.tag, node.value, node.props, parent)
+            else:
+                index = self.add(None, SafeString(node.to_html()), None, parent)
+            if root == NONE:
+                root = index
+        return root
+
+    def to_bytes(self):
+        """
+        Serialize the document. It's written with marshal as plain bytes,
+        strings and lists, so unlike pickle, loading it never runs code.
+        """
+        safe = [i for i, text in enumerate(self.strings) if type(text) is SafeString]
+        return marshal.dumps(
+            (
+                FORMAT_VERSION,
+                [getattr(self, name).tobytes() for name in self.ARRAYS],
+                self.tag_names,
+                # marshal only takes exact strs
+                [str(text) for text in self.strings],
+                safe,
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a document written by to_bytes; ValueError if it isn't one."""
+        try:
+            version, arrays, tag_names, strings, safe = marshal.loads(data)
+        except (EOFError, TypeError, ValueError) as e:
+            raise ValueError(f"not a serialized document: {e}") from None
+        if version != FORMAT_VERSION or len(arrays) != len(cls.ARRAYS):
+            raise ValueError("unsupported document format")
+        document = cls()
+        for name, raw in zip(cls.ARRAYS, arrays):
+            setattr(document, name, array(getattr(document, name).typecode, raw))
+        for index in safe:
+            strings[index] = SafeString(strings[index])
+        document.tag_names = tag_names
+        document.strings = strings
+        # Rebuild the intern tables so the document can still be added to
+        document._tag_ids = {tag: index for index, tag in enumerate(tag_names)}
+        document._string_ids = {text: index for index, text in enumerate(strings)}
+        for index in safe:
+            del document._string_ids[strings[index]]
+            document._safe_string_ids[strings[index]] = index
+        return document
+
+    def children(self, index):
+        """Yield the indices of a node's children in order."""
+        child = self.first_child[index]
+        while child != NONE:
+            yield child
+            child = self.next_sibling[child]
+
+    def props(self, index):
+        """Return a node's props as a dict, or None if it has none."""
+        start, end = self.prop_offsets[index], self.prop_offsets[index + 1]
+        if start == end:
+            return None
+        items, strings = self.prop_items, self.strings
+        return {strings[items[i]]: strings[items[i + 1]] for i in range(start, end, 2)}
+
+    def to_node(self, index=0):
+        """Build the HTMLNode tree for the subtree at index."""
+        # Children are built before their parents: walk the subtree in
+        # document order, then construct in reverse
+        order = []
+        pending = [index]
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            if self.is_parent[node]:
+                pending.extend(reversed(list(self.children(node))))
+        built = {}
+        for node in reversed(order):
+            tag = self.tag_names[self.tags[node]]
+            if self.is_parent[node]:
+                children = [built.pop(child) for child in self.children(node)]
+                built[node] = ParentNode(tag, children, self.props(node))
+            else:
+                value = self.values[node]
+                value = None if value == NONE else self.strings[value]
+                built[node] = LeafNode(tag, value, self.props(node))
+        return built[index]
+
+    def _props_html(self, index):
+        start, end = self.prop_offsets[index], self.prop_offsets[index + 1]
+        if start == end:
+            return ""
+        items, strings = self.prop_items, self.strings
+        return "".join(
+            f' {strings[items[i]]}="{strings[items[i + 1]].translate(ATTRIBUTE_ESCAPES)}"'
+            for i in range(start, end, 2)
+        )
+
+    def iter_html(self, encoding="utf-8"):
+        """
+        Yield the encoded HTML of the whole document, so it can stand in
+        for a ParentNode wherever a page is written.
+        """
+        yield self.to_html().encode(encoding)
+
+    def to_html(self, index=0):
+        """
+        Render the subtree at index, producing the same HTML as
+        to_node(index).to_html() without building any nodes.
+        """
+        tags, tag_names, values, strings = (
+            self.tags,
+            self.tag_names,
+            self.values,
+            self.strings,
+        )
+        is_parent, first_child = self.is_parent, self.first_child
+        next_sibling, parents = self.next_sibling, self.parents
+        parts = []
+        append = parts.append
+        node = index
+        while True:
+            tag = tag_names[tags[node]]
+            if is_parent[node]:
+                append(f"<{tag}{self._props_html(node)}>")
+                child = first_child[node]
+                if child != NONE:
+                    node = child
+                    continue
+                append(f"</{tag}>")
+            elif tag in SELF_CLOSING_TAGS:
+                append(f"<{tag}{self._props_html(node)} />")
+            else:
+                # Same escaping as LeafNode.to_html
+                value = strings[values[node]]
+                if not isinstance(value, str):
+                    value = str(value)
+                if "&" in value or "<" in value or ">" in value:
+                    value = _escape_text(value)
+                if tag is None:
+                    append(value)
+                else:
+                    append(f"<{tag}{self._props_html(node)}>{value}</{tag}>")
+            # Move to the next node in document order, closing every parent
+            # whose last child is done; the parent links replace a stack
+            while node != index:
+                sibling = next_sibling[node]
+                if sibling != NONE:
+                    node = sibling
+                    break
+                node = parents[node]
+                append(f"</{tag_names[tags[node]]}>")
+            else:
+                return "".join(parts)
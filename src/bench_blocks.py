@@ -0,0 +1,84 @@
+import re
+import sys
+import time
+
+from blocknode import block_to_block_type, track_and_manage_blocks
+
+SAMPLE_BLOCKS = [
+    "# A heading with **bold** text",
+    "A paragraph with _italic_ words, a `code span` and a [link](https://example.com).",
+    "- first item\n- second item with **bold**\n- third item",
+    "1. one\n2. two\n3. three",
+    "> a quote with _emphasis_\n> over two lines",
+    "```\ndef main():\n    return 0\n```",
+    "Plain closing sentence for the section.",
+]
+
+
+def make_corpus(count):
+    return [SAMPLE_BLOCKS[i % len(SAMPLE_BLOCKS)] for i in range(count)]
+
+
+def per_block_us(func, blocks, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(blocks)
+        best = min(best, time.perf_counter() - start)
+    return best / len(blocks) * 1e6
+
+
+def classify_compiled(blocks):
+    for block in blocks:
+        block_to_block_type(block)
+
+
+def classify_with_strings(evict):
+    # The regex classifier block_to_block_type replaced, calling re.match
+    # with pattern strings and relying on the re module cache
+    checks = [
+        (r"^#{1,6}( |$)", 0),
+        (r"^```.*```$", re.DOTALL),
+        (r"^>.*", re.DOTALL),
+        (r"^(\s*[-\*](\s+.*)?(\n)?)+$", re.DOTALL),
+    ]
+
+    def classify(blocks):
+        for block in blocks:
+            if evict:
+                # Other regex users in a large build push these out
+                re.purge()
+            for pattern, flags in checks:
+                if re.match(pattern, block, flags):
+                    break
+
+    return classify
+
+
+def bench_block_patterns(count=50_000):
+    blocks = make_corpus(count)
+    print(f"per-block cost over {count} blocks (us)")
+    print(
+        f"{'classify, first-char dispatch':<32} {per_block_us(classify_compiled, blocks):>8.2f}"
+    )
+    print(
+        f"{'classify, regex strings':<32} "
+        f"{per_block_us(classify_with_strings(False), blocks):>8.2f}"
+    )
+    print(
+        f"{'classify, regex + eviction':<32} "
+        f"{per_block_us(classify_with_strings(True), blocks):>8.2f}"
+    )
+    print(
+        f"{'track_and_manage_blocks':<32} "
+        f"{per_block_us(track_and_manage_blocks, blocks, repeat=1):>8.2f}"
+    )
+
+
+def main():
+    bench_block_patterns()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+
+from build import build_site, format_report
+
+
+def write_site(content_dir, pages):
+    body = "\n\n".join(
+        [
+            "Some **bold** text, some _italic_ text and a [link](https://example.com).",
+            "- one\n- two with `code`\n- three",
+            "> a quote\n> over two lines",
+            "```\nprint('hello')\n```",
+        ]
+        * 20
+    )
+    for i in range(pages):
+        path = os.path.join(content_dir, f"section{i % 10}", f"page{i}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(f"# Page {i}\n\n{body}")
+
+
+def bench_build(pages=500):
+    print(f"build_site over {pages} pages")
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        write_site(content_dir, pages)
+        for workers in [1, 2, 4]:
+            report = build_site(
+                content_dir, os.path.join(tmp, f"dist{workers}"), None, workers=workers
+            )
+            print(f"workers={workers}")
+            for line in format_report(report):
+                print(f"  {line}")
+
+        # Incremental rebuilds reuse the workers=1 output
+        dest_dir = os.path.join(tmp, "dist1")
+        report = build_site(content_dir, dest_dir, None, workers=1)
+        print(f"rebuild, nothing changed: {report.seconds * 1e3:.1f} ms")
+        with open(os.path.join(content_dir, "section0", "page0.md"), "a") as fp:
+            fp.write("\n\nOne more paragraph.")
+        report = build_site(content_dir, dest_dir, None, workers=1)
+        print(f"rebuild, one page edited: {report.seconds * 1e3:.1f} ms")
+
+        # A template change regenerates every page; the parse cache saves
+        # reparsing them
+        cache_dir = os.path.join(tmp, "cache")
+        build_site(
+            content_dir, dest_dir, None, workers=1, force=True, cache_dir=cache_dir
+        )
+        for cached in [False, True]:
+            template_path = os.path.join(tmp, f"template{cached}.html")
+            with open(template_path, "w") as fp:
+                fp.write(f"<main data-cached={cached}>{{{{ Content }}}}</main>")
+            report = build_site(
+                content_dir,
+                dest_dir,
+                None,
+                template_path,
+                workers=1,
+                cache_dir=cache_dir if cached else None,
+            )
+            label = "parse cache" if cached else "no cache"
+            print(f"rebuild, template changed, {label}: {report.seconds * 1e3:.1f} ms")
+
+
+def main():
+    bench_build()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import sys
+import time
+from unittest import mock
+
+from bench_blocks import make_corpus
+from blocknode import markdown_to_html_node
+from htmlnode import SELF_CLOSING_TAGS, LeafNode
+
+CODE_BLOCK = "```\nif (a < b && b > c) {\n    return a & mask;\n}\n```"
+
+
+def unescaped_to_html(self):
+    # The leaf renderer before escaping, emitting values as-is
+    if self.tag is None:
+        return self.value
+    if self.tag in SELF_CLOSING_TAGS:
+        return f"<{self.tag}{self.props_to_html()} />"
+    if self.props:
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+    return f"<{self.tag}>{self.value}</{self.tag}>"
+
+
+def render_ms(node, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        node.to_html()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def bench_escape(count=20_000):
+    documents = [
+        ("prose", "\n\n".join(make_corpus(count))),
+        ("code < &", "\n\n".join([CODE_BLOCK] * count)),
+        ("text < &", "\n\n".join(["Fish & chips <for> **two & three**"] * count)),
+    ]
+    print(f"to_html over {count} blocks (ms)")
+    print(f"{'document':<10} {'escaped':>9} {'unescaped':>10} {'cost':>7}")
+    for name, markdown in documents:
+        node = markdown_to_html_node(markdown)
+        escaped = render_ms(node)
+        with mock.patch.object(LeafNode, "to_html", unescaped_to_html):
+            unescaped = render_ms(node)
+        cost = (escaped / unescaped - 1) * 100
+        print(f"{name:<10} {escaped:>9.1f} {unescaped:>10.1f} {cost:>6.0f}%")
+
+
+def main():
+    bench_escape()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import sys
+import time
+
+from htmlnode import LeafNode, ParentNode
+
+
+def nested_quotes(depth):
+    # Nested blockquotes: every level wraps the whole rest of the document
+    node = ParentNode("p", [LeafNode(None, "quoted text " * 8)])
+    for _ in range(depth):
+        node = ParentNode("blockquote", [node, LeafNode("p", "reply")])
+    return node
+
+
+def long_list(items):
+    return ParentNode(
+        "div",
+        [
+            ParentNode(
+                "ul",
+                [ParentNode("li", [LeafNode("b", "item"), LeafNode(None, f" {i}")])],
+            )
+            for i in range(items)
+        ],
+    )
+
+
+def concat_to_html(node):
+    # The recursive renderer ParentNode.to_html replaced
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+    par_str = ""
+    for child in node.children:
+        par_str += concat_to_html(child)
+    return f"<{node.tag}{node.props_to_html()}>{par_str}</{node.tag}>"
+
+
+def best_seconds(func, node, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(node)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_render(name, build, sizes):
+    print(f"{name}: ns per output byte")
+    print(f"{'size':>8} {'bytes':>10} {'stack':>8} {'recursive':>10}")
+    for size in sizes:
+        node = build(size)
+        length = len(node.to_html())
+        stack = best_seconds(ParentNode.to_html, node) / length * 1e9
+        try:
+            recursive = best_seconds(concat_to_html, node) / length * 1e9
+            recursive = f"{recursive:>10.2f}"
+        except RecursionError:
+            recursive = f"{'overflow':>10}"
+        print(f"{size:>8} {length:>10} {stack:>8.2f} {recursive}")
+
+
+def main():
+    bench_render("nested blockquotes", nested_quotes, [100, 200, 400, 800, 3000])
+    bench_render("long list", long_list, [1_000, 10_000, 100_000])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import sys
+import time
+
+from inline_markdown import split_nodes_image, split_nodes_link
+from text_to_nodes import text_to_textnodes
+from textnode import TextNode, TextType
+
+SENTENCE = (
+    "Some **bold** words, an _italic_ one, a `code span`, "
+    "an ![image](https://example.com/img.png) and a [link](https://example.com). "
+)
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_text_to_textnodes(spans_per_paragraph=(1, 10, 100, 500), paragraphs=100):
+    print("text_to_textnodes throughput (MB/s)")
+    print(f"{'sentences':>10} {'pipeline':>10} {'lexer':>10} {'speedup':>8}")
+    for count in spans_per_paragraph:
+        paragraph = SENTENCE * count
+        size = len(paragraph) * paragraphs / 1e6
+
+        def run(compat):
+            for _ in range(paragraphs):
+                text_to_textnodes(paragraph, compat=compat)
+
+        old = best_of(lambda: run(True))
+        new = best_of(lambda: run(False))
+        print(f"{count:>10} {size / old:>10.2f} {size / new:>10.2f} {old / new:>7.1f}x")
+
+
+def bench_split_links(sizes=(1250, 2500, 5000, 10000)):
+    # Time per link should stay flat as the document grows
+    print("split_nodes_image / split_nodes_link on one link-dense node")
+    print(f"{'links':>10} {'images us':>10} {'links us':>10} {'per link':>9}")
+    for count in sizes:
+        text = "".join(
+            f"- ![icon {i}](https://example.com/{i}.png) "
+            f"[entry {i}](https://example.com/{i}) notes\n"
+            for i in range(count)
+        )
+        node = TextNode(text, TextType.TEXT)
+        images = best_of(lambda: split_nodes_image([node]))
+        links = best_of(lambda: split_nodes_link([node]))
+        per_link = (images + links) / count * 1e6
+        print(
+            f"{count:>10} {images * 1e6:>10.0f} {links * 1e6:>10.0f} "
+            f"{per_link:>7.2f}us"
+        )
+
+
+def main():
+    bench_text_to_textnodes()
+    print()
+    bench_split_links()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
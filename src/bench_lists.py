@@ -0,0 +1,45 @@
+import sys
+import time
+from unittest import mock
+
+from blocknode import markdown_to_html_node
+from htmlnode import ParentNode
+
+
+def list_document(lists, items):
+    block = "\n".join(f"- item {i} with **bold** and `code`" for i in range(items))
+    return "\n\n".join([block] * lists)
+
+
+def checked(tag, children, props=None):
+    # What the block processors paid before: the validating constructor
+    return ParentNode(tag, children, props)
+
+
+def build_ms(markdown, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown_to_html_node(markdown)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def bench_lists():
+    print("markdown_to_html_node on list-heavy documents (ms)")
+    print(f"{'lists x items':<14} {'trusted':>9} {'checked':>9}")
+    for lists, items in [(200, 10), (1_000, 10), (100, 200)]:
+        markdown = list_document(lists, items)
+        trusted = build_ms(markdown)
+        with mock.patch.object(ParentNode, "trusted", checked):
+            validated = build_ms(markdown)
+        print(f"{f'{lists} x {items}':<14} {trusted:>9.1f} {validated:>9.1f}")
+
+
+def main():
+    bench_lists()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import gc
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import blocknode
+import textnode
+from bench_blocks import make_corpus
+from blocknode import markdown_to_html_node
+
+
+class DictLeafNode:
+    # The node layout before __slots__: same attributes, kept in a __dict__
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, tag, children, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = [child for child in children if child is not None]
+        self.props = props
+
+    @classmethod
+    def trusted(cls, tag, children, props=None):
+        # Same as ParentNode.trusted: the children list is used as-is
+        node = cls.__new__(cls)
+        node.tag = tag
+        node.value = None
+        node.children = children
+        node.props = props
+        return node
+
+
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def measure(markdown, arena=False):
+    # Returns (nodes, bytes retained by the document, peak bytes while
+    # building, seconds for a full collection while the document is alive)
+    tracemalloc.start()
+    document = markdown_to_html_node(markdown, arena=arena)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+    nodes = len(document) if arena else count_nodes(document)
+    return nodes, retained, peak, collect
+
+
+def measure_arena(markdown):
+    return measure(markdown, arena=True)
+
+
+def measure_dict_layout(markdown):
+    with mock.patch.object(blocknode, "ParentNode", DictParentNode), mock.patch.object(
+        blocknode, "LeafNode", DictLeafNode
+    ), mock.patch.object(textnode, "LeafNode", DictLeafNode):
+        return measure(markdown)
+
+
+def bench_memory(count=100_000):
+    markdown = "\n\n".join(make_corpus(count))
+    print(f"node memory for a {count}-block document")
+    # bytes/node is everything the tree retains (text, props, child lists)
+    # over its node count, so the difference between rows is per-node
+    print(
+        f"{'layout':<10} {'nodes':>9} {'bytes/node':>11} {'peak MiB':>9} {'gc ms':>7}"
+    )
+    layouts = [
+        ("__dict__", measure_dict_layout),
+        ("__slots__", measure),
+        ("arena", measure_arena),
+    ]
+    for name, func in layouts:
+        nodes, retained, peak, collect = func(markdown)
+        print(
+            f"{name:<10} {nodes:>9} {retained / nodes:>11.1f} "
+            f"{peak / 2**20:>9.1f} {collect * 1e3:>7.1f}"
+        )
+
+
+def main():
+    bench_memory()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
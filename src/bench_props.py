@@ -0,0 +1,70 @@
+import sys
+import time
+from unittest import mock
+
+from blocknode import markdown_to_html_node
+from htmlnode import HTMLNode
+
+
+def link_page(count):
+    return "\n\n".join(
+        f'See [page {i}](https://example.com/docs/{i}?ref="nav") and '
+        f"[the index](https://example.com/) for more."
+        for i in range(count)
+    )
+
+
+def image_page(count):
+    return "\n\n".join(
+        f'![figure {i} "detail"](/static/img/figure-{i}.png) '
+        f"![thumb {i}](/static/img/thumb-{i}.png)"
+        for i in range(count)
+    )
+
+
+def uncached_props_to_html(self):
+    # The serializer props_to_html replaced, rebuilding the string and
+    # escaping every value on every call
+    if self.props is None:
+        return ""
+    return "".join(
+        list(
+            map(
+                lambda item: f' {item[0]}="{item[1].replace('"', "&quot;" )}"',
+                self.props.items(),
+            )
+        )
+    )
+
+
+def render_us(markdown, renders=5, repeat=3):
+    # Best time per render of one tree that is rendered several times, as
+    # when a page goes to a preview, a feed and its final template
+    node = markdown_to_html_node(markdown)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(renders):
+            node.to_html()
+        best = min(best, (time.perf_counter() - start) / renders)
+    return best * 1e6
+
+
+def bench_props(count=2_000):
+    print(f"to_html per render, {count} blocks (us)")
+    print(f"{'page':<8} {'cached':>10} {'uncached':>10}")
+    for name, page in [("links", link_page), ("images", image_page)]:
+        markdown = page(count)
+        cached = render_us(markdown)
+        with mock.patch.object(HTMLNode, "props_to_html", uncached_props_to_html):
+            uncached = render_us(markdown)
+        print(f"{name:<8} {cached:>10.0f} {uncached:>10.0f}")
+
+
+def main():
+    bench_props()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
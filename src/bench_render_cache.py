@@ -0,0 +1,49 @@
+import sys
+import time
+
+from bench_blocks import make_corpus
+from blocknode import markdown_to_html_node
+from htmlnode import RENDER_CACHE_STATS, LeafNode, ParentNode
+
+
+def timed_render(node):
+    hits, misses = RENDER_CACHE_STATS["hits"], RENDER_CACHE_STATS["misses"]
+    start = time.perf_counter()
+    node.to_html()
+    elapsed = (time.perf_counter() - start) * 1e3
+    hits = RENDER_CACHE_STATS["hits"] - hits
+    misses = RENDER_CACHE_STATS["misses"] - misses
+    return elapsed, hits, misses
+
+
+def bench_render_cache(count=20_000):
+    markdown = "\n\n".join(make_corpus(count))
+    plain = markdown_to_html_node(markdown)
+    page = markdown_to_html_node(markdown)
+    page.memoize_subtree()
+
+    rows = [("no memoization", timed_render(plain))]
+    rows.append(("cold render", timed_render(page)))
+    rows.append(("re-render", timed_render(page)))
+    # A preview edit: replace one top-level block and render again
+    blocks = list(page.children)
+    blocks[count // 2] = ParentNode("p", [LeafNode(None, "Edited paragraph.")])
+    page.children = blocks
+    rows.append(("one block edited", timed_render(page)))
+    # Edit a leaf deep inside an unchanged block
+    blocks[count // 3].children[0].value = "changed"
+    rows.append(("one leaf edited", timed_render(page)))
+
+    print(f"to_html with the render cache, {count} blocks")
+    print(f"{'render':<18} {'ms':>8} {'hits':>7} {'misses':>7}")
+    for name, (elapsed, hits, misses) in rows:
+        print(f"{name:<18} {elapsed:>8.2f} {hits:>7} {misses:>7}")
+
+
+def main():
+    bench_render_cache()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from static_sync import sync_static
+
+
+def write_assets(static_dir, files, size):
+    for i in range(files):
+        path = os.path.join(static_dir, f"media{i % 8}", f"file{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fp:
+            fp.write(os.urandom(size))
+
+
+def copy_tree(static_dir, dest_dir):
+    # What a build did before: copy every file, every time
+    shutil.copytree(static_dir, dest_dir, dirs_exist_ok=True)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def bench_static_sync(files=256, size=256 * 1024):
+    print(f"syncing {files} files of {size // 1024} KiB (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = os.path.join(tmp, "public")
+        write_assets(static_dir, files, size)
+
+        ms, _ = timed(copy_tree, static_dir, os.path.join(tmp, "copied"))
+        print(f"{'copytree, every build':<30} {ms:>8.1f}")
+        for link in [False, True]:
+            dest_dir = os.path.join(tmp, f"dist{link}")
+            os.makedirs(dest_dir)
+            label = "link" if link else "copy"
+            ms, report = timed(sync_static, static_dir, dest_dir, link=link)
+            print(f"{f'sync ({label}), first build':<30} {ms:>8.1f}")
+            ms, report = timed(sync_static, static_dir, dest_dir, link=link)
+            print(
+                f"{f'sync ({label}), unchanged':<30} {ms:>8.1f}   "
+                f"{report.skipped_bytes / 2**20:.0f} MiB skipped"
+            )
+        with open(os.path.join(static_dir, "media0", "file0.bin"), "r+b") as fp:
+            fp.write(b"changed")
+        ms, report = timed(sync_static, static_dir, os.path.join(tmp, "distFalse"))
+        print(
+            f"{'sync (copy), one file edited':<30} {ms:>8.1f}   "
+            f"{report.copied_bytes / 2**20:.2f} MiB copied"
+        )
+
+
+def main():
+    bench_static_sync()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
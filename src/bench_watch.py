@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from watch import TreeWatcher, Watcher
+
+
+def write_site(content_dir, pages):
+    for i in range(pages):
+        path = os.path.join(content_dir, f"section{i % 20}", f"page{i}.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(f"# Page {i}\n\nSome **bold** text.\n\n- one\n- two")
+
+
+def save(path, text, atomic):
+    if atomic:
+        # How most editors save: write a new file and rename it over
+        with open(path + ".swp", "w", encoding="utf-8") as fp:
+            fp.write(text)
+        os.replace(path + ".swp", path)
+    else:
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(text)
+
+
+def turnaround_ms(source, dest, marker, atomic):
+    start = time.perf_counter()
+    save(source, f"# Edited\n\n{marker}", atomic)
+    while True:
+        try:
+            with open(dest, encoding="utf-8") as fp:
+                if marker in fp.read():
+                    return (time.perf_counter() - start) * 1e3
+        except FileNotFoundError:
+            pass
+        time.sleep(0.001)
+
+
+def bench_poll(content_dir):
+    watcher = TreeWatcher(content_dir, ".md")
+    start = time.perf_counter()
+    for _ in range(20):
+        watcher.poll()
+    poll = (time.perf_counter() - start) / 20 * 1e3
+    start = time.perf_counter()
+    TreeWatcher(content_dir, ".md")
+    full = (time.perf_counter() - start) * 1e3
+    print(f"poll with nothing changed: {poll:.1f} ms (full scan: {full:.1f} ms)")
+
+
+def bench_watch(pages=10_000):
+    print(f"watch mode over {pages} pages")
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        dest_dir = os.path.join(tmp, "dist")
+        write_site(content_dir, pages)
+        bench_poll(content_dir)
+
+        watcher = Watcher(content_dir, dest_dir, None, log=lambda line: None)
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        try:
+            while not hasattr(watcher, "manifest"):
+                time.sleep(0.01)
+            time.sleep(0.2)
+            rows = [
+                ("atomic save", 7, True),
+                ("atomic save again", 7, True),
+                ("in-place save, recently edited", 7, False),
+                ("in-place save, not recently edited", 8, False),
+            ]
+            for n, (label, page, atomic) in enumerate(rows):
+                source = os.path.join(
+                    content_dir, f"section{page % 20}", f"page{page}.md"
+                )
+                dest = os.path.join(dest_dir, f"section{page % 20}", f"page{page}.html")
+                ms = turnaround_ms(source, dest, f"marker{n}", atomic)
+                print(f"{label:<36} {ms:>7.1f} ms")
+                time.sleep(0.2)
+        finally:
+            watcher.stop()
+            thread.join()
+
+
+def main():
+    bench_watch()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
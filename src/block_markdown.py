@@ -1,27 +1,76 @@
+FENCE = "```"
+
+
 def markdown_to_blocks(markdown):
     """
     Split markdown text into blocks based on blank lines.
     Strips leading/trailing whitespace from each line.
+    Fenced code blocks are kept whole with their lines verbatim.
     """
     if not markdown:
         return []
+    return list(iter_markdown_blocks(markdown.splitlines()))
+
+
+def iter_markdown_blocks(lines):
+    """
+    Yield blocks from any iterable of lines as each one completes.
+
+    lines can be an open file, stdin, a list or a generator; bytes lines
+    (for example from mmap.readline) are decoded as UTF-8. Only the block
+    being built is held in memory, never the whole document.
 
-    # Split into lines
-    lines = markdown.splitlines()
-    blocks = []
+    Lines are scanned by a small state machine. Outside a fence, lines are
+    stripped and blocks end at blank lines. A line opening a ``` fence ends
+    the current block, and everything up to the closing fence is one code
+    block whose lines are kept as written, blank lines included; only the
+    opening fence's own indentation is removed from them. A fence left open
+    at the end of the input is closed there.
+    """
     current_block_lines = []
+    fence_indent = None  # Indentation of the open fence, None outside one
 
     for line in lines:
-        if line.strip():  # Line has content after stripping
-            current_block_lines.append(line.strip())  # Strip each line
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+
+        if fence_indent is not None:
+            if _is_closing_fence(stripped):
+                current_block_lines.append(stripped)
+                yield "\n".join(current_block_lines)
+                current_block_lines = []
+                fence_indent = None
+            else:
+                # Code is sliced verbatim apart from the fence's indentation
+                indent = len(line) - len(line.lstrip(" \t"))
+                current_block_lines.append(line[min(indent, fence_indent) :])
+            continue
+
+        if _is_opening_fence(stripped):
+            if current_block_lines:
+                yield "\n".join(current_block_lines)
+            current_block_lines = [stripped]
+            fence_indent = len(line) - len(line.lstrip(" \t"))
+        elif stripped:  # Line has content after stripping
+            current_block_lines.append(stripped)  # Strip each line
         elif current_block_lines:  # Empty line and we have a block to finish
-            block = "\n".join(current_block_lines)
-            blocks.append(block)
+            yield "\n".join(current_block_lines)
             current_block_lines = []
 
     # Process the last block if any
     if current_block_lines:
-        block = "\n".join(current_block_lines)
-        blocks.append(block)
+        if fence_indent is not None:
+            current_block_lines.append(FENCE)
+        yield "\n".join(current_block_lines)
+
+
+def _is_opening_fence(stripped):
+    # A backtick fence's info string may not contain backticks, so a line
+    # like ```code``` stays an ordinary one-line block
+    return stripped.startswith(FENCE) and "`" not in stripped.lstrip("`")
+
 
-    return blocks
+def _is_closing_fence(stripped):
+    return stripped.startswith(FENCE) and not stripped.strip("`")
@@ -1,8 +1,19 @@
-import re
+from collections import namedtuple
 from enum import Enum
 
-from block_markdown import markdown_to_blocks
+from arena import DocumentArena
+from block_markdown import iter_markdown_blocks, markdown_to_blocks
 from htmlnode import HTMLNode, ParentNode, LeafNode
+from patterns import (
+    BOLD_RE,
+    CODE_INFO_LINE_RE,
+    INLINE_CODE_RE,
+    ITALIC_RE,
+    ORDERED_ITEM_RE,
+    PARAGRAPH_BREAK_RE,
+    UNORDERED_ITEM_RE,
+    WHITESPACE_RE,
+)
 from text_to_nodes import text_to_textnodes
 from textnode import TextNode, TextType, text_node_to_html_node
 
@@ -17,25 +28,86 @@ class BlockType(Enum):
     EMPTY = ""
 
 
+# One classified block: its type, the raw text, and for paragraphs the text
+# with whitespace collapsed to single spaces (None for other types)
+Block = namedtuple("Block", ["block_type", "raw", "normalized"])
+
+
+def classify_blocks(blocks):
+    """
+    Turn raw blocks into Block records, classifying and normalizing each
+    block exactly once for everything downstream.
+    """
+    return list(iter_classified_blocks(blocks))
+
+
+def iter_classified_blocks(blocks):
+    """Lazy classify_blocks: yield a Block record for each incoming block."""
+    for block in blocks:
+        block_type = block_to_block_type(block)
+        normalized = None
+        if block_type == BlockType.PARAGRAPH:
+            normalized = WHITESPACE_RE.sub(" ", block.strip())
+        yield Block(block_type, block, normalized)
+
+
 def block_to_block_type(block):
-    # print(f"this is the block to be matched: {block}")
-    match (block):
-        case str() if block.strip() == "":
-            return None
-        case str() if re.match(r"^#{1,6}( |$)", block):
+    """
+    Classify a block by its first character, then validate that one kind.
+
+    Each check is a single bounded scan, so classifying a block is
+    O(len(block)) whatever it contains, including long pasted logs that
+    merely start like a list.
+    """
+    if not isinstance(block, str):
+        return BlockType.PARAGRAPH
+    if not block or block.isspace():
+        return None
+    match (block[0]):
+        case "#" if _is_heading(block):
             return BlockType.HEADING
-        case str() if re.match(r"^```.*```$", block, re.DOTALL):
+        case "`" if _is_code_block(block):
             return BlockType.CODE
-        case str() if re.match(r"^>.*", block, re.DOTALL):
+        case ">":
             return BlockType.QUOTE
-        case str() if re.match(r"^(\s*[-\*](\s+.*)?(\n)?)+$", block, re.DOTALL):
-            return BlockType.UNORDERED_LIST
-        case str() if _is_ordered_list(block):
+        case "1" if _is_ordered_list(block):
             return BlockType.ORDERED_LIST
+        case "-" | "*" if _is_unordered_list(block):
+            return BlockType.UNORDERED_LIST
+        case first if first.isspace() and _is_unordered_list(block):
+            return BlockType.UNORDERED_LIST
         case _:
             return BlockType.PARAGRAPH
 
 
+def _is_heading(block):
+    # One to six "#", then a space or the end of the block (a single
+    # trailing newline counts as the end)
+    prefix = block[:7]
+    level = len(prefix) - len(prefix.lstrip("#"))
+    if level > 6:
+        return False
+    return block[level : level + 1] in ("", " ") or block[level:] == "\n"
+
+
+def _is_code_block(block):
+    # Opening and closing fences that do not overlap, again allowing a
+    # single trailing newline after the closing one
+    if not block.startswith("```"):
+        return False
+    if block.endswith("```\n"):
+        return len(block) >= 7
+    return block.endswith("```") and len(block) >= 6
+
+
+def _is_unordered_list(block):
+    # Optional indentation, a run of "-"/"*" markers, then either the end
+    # of the block or whitespace, after which anything may follow
+    rest = block.lstrip()
+    items = rest.lstrip("-*")
+    return len(items) < len(rest) and (not items or items[0].isspace())
+
+
 def _is_ordered_list(block):
     lines = block.split("\n")
     for i, line in enumerate(lines, 1):
@@ -67,8 +139,13 @@ def process_paragraph_block(block):
     Process paragraph blocks, normalizing all whitespace to single spaces.
     """
     # Normalize all whitespace to single spaces
-    normalized_text = re.sub(r"\s+", " ", block.strip())
-    return ParentNode("p", children=parse_nested_elements(normalized_text))
+    normalized_text = WHITESPACE_RE.sub(" ", block.strip())
+    return paragraph_node(normalized_text)
+
+
+def paragraph_node(normalized_text):
+    """Build a paragraph from text whose whitespace is already normalized."""
+    return ParentNode.trusted("p", parse_nested_elements(normalized_text))
 
 
 def process_heading_block(block):
@@ -79,7 +156,7 @@ def process_heading_block(block):
     line = heading_lines[0]
     level = min(heading_size(line), 6)
     content = line[level:].strip()
-    return ParentNode(f"h{level}", children=parse_nested_elements(content))
+    return ParentNode.trusted(f"h{level}", parse_nested_elements(content))
 
 
 def process_list_block(block, is_ordered):
@@ -95,23 +172,23 @@ def process_list_block(block, is_ordered):
 
         # Extract list item content
         if is_ordered:
-            match = re.match(r"^\d+\.\s*(.*)", line)
+            match = ORDERED_ITEM_RE.match(line)
             if match:
                 content = match.group(1).strip()
                 list_items.append(
-                    ParentNode("li", children=parse_nested_elements(content))
+                    ParentNode.trusted("li", parse_nested_elements(content))
                 )
         else:
-            match = re.match(r"^[-\*]\s*(.*)", line)
+            match = UNORDERED_ITEM_RE.match(line)
             if match:
                 content = match.group(1).strip()
                 list_items.append(
-                    ParentNode("li", children=parse_nested_elements(content))
+                    ParentNode.trusted("li", parse_nested_elements(content))
                 )
 
     # Only create a list if we have items
     if list_items:
-        return ParentNode(parent_tag, children=list_items)
+        return ParentNode.trusted(parent_tag, list_items)
     return None
 
 
@@ -126,14 +203,12 @@ def process_code_block(block):
         content = content[:-3]
 
     # Trim any starting language identifier if present
-    content = re.sub(r"^.*?\n", "", content, count=1)
+    content = CODE_INFO_LINE_RE.sub("", content, count=1)
 
     # Create text node with preserved whitespace
     code_text_node = TextNode(content, TextType.TEXT)  # Note: Using TEXT type, not CODE
     code_html_node = text_node_to_html_node(code_text_node)
-    return ParentNode(
-        tag="pre", children=[ParentNode(tag="code", children=[code_html_node])]
-    )
+    return ParentNode.trusted("pre", [ParentNode.trusted("code", [code_html_node])])
 
 
 def process_quote_block(block):
@@ -176,7 +251,7 @@ def process_quote_block(block):
     else:
         # For regular blockquote content, join with spaces
         content = " ".join(content_lines)
-        return ParentNode("blockquote", children=parse_nested_elements(content))
+        return ParentNode.trusted("blockquote", parse_nested_elements(content))
 
 
 # Fix for nested blockquotes
@@ -274,8 +349,10 @@ def build_nested_blockquotes(structured_content):
     return blockquotes[1]
 
 
-def get_block_parent(block, block_type):
+def get_block_parent(block, block_type, normalized=None):
     match (block_type):
+        case BlockType.PARAGRAPH if normalized is not None:
+            return paragraph_node(normalized)
         case BlockType.PARAGRAPH:
             return process_paragraph_block(block)
         case BlockType.HEADING:
@@ -292,48 +369,43 @@ def get_block_parent(block, block_type):
             raise ValueError(f"Unsupported block type: {block_type}")
 
 
+# Inline patterns in priority order. Every bold span is taken before any
+# italic one is considered, and italic before code, so this is deliberately
+# not a single "earliest match wins" alternation: that would build
+# different trees for text such as "_a_ **b**".
+NESTED_PATTERNS = (
+    (BOLD_RE, "b"),  # Bold (**text**)
+    (ITALIC_RE, "i"),  # Italic (_text_)
+    (INLINE_CODE_RE, "code"),  # Code (`text`)
+)
+
+
 def parse_nested_elements(text):
     if not text:  # Add a safety guard for empty content
         return [text_node_to_html_node(TextNode("", TextType.TEXT))]
     children = []
 
-    # Define regex patterns for inline elements
-    PATTERNS = [
-        (r"\*\*(.+?)\*\*", "b"),  # Bold (**text**)
-        (r"_(.+?)_", "i"),  # Italic (_text_)
-        (r"`(.+?)`", "code"),  # Code (`text`)
-    ]
+    # Advance a position over the original string instead of slicing off
+    # the remainder. Once a pattern finds no match after pos it cannot match
+    # any later remainder either, so each pattern scans forward only once.
+    pos = 0
+    for pattern, tag in NESTED_PATTERNS:
+        match = pattern.search(text, pos)
+        while match:
+            # Process plain text before the match
+            if match.start() > pos:
+                children.extend(text_to_children(text[pos : match.start()]))
 
-    while text:
-        match_found = False
+            # Recursively process matched content
+            nested_text = match.group(1)
+            children.append(ParentNode.trusted(tag, parse_nested_elements(nested_text)))
 
-        for pattern, tag in PATTERNS:
-            match = re.search(pattern, text)
-            if match:
-                match_found = True
-
-                # Process plain text before the match
-                if match.start() > 0:
-                    plain_text = text[: match.start()]
-                    children.extend(
-                        text_to_children(plain_text)
-                    )  # Use text_to_children here!
-
-                # Recursively process matched content
-                nested_text = match.group(1)
-                children.append(
-                    ParentNode(tag=tag, children=parse_nested_elements(nested_text))
-                )
+            pos = match.end()
+            match = pattern.search(text, pos)
 
-                # Update `text` to continue after the match
-                text = text[match.end() :]
-                break
-
-        if not match_found:
-            # No matches left in the text, process the remaining part
-            # Pass this plain text through text_to_children
-            children.extend(text_to_children(text))
-            break
+    # No matches left in the text, process the remaining part
+    if pos < len(text):
+        children.extend(text_to_children(text[pos:]))
 
     return children
 
@@ -345,22 +417,39 @@ def track_and_manage_blocks(blocks):
     This version only merges special cases of consecutive paragraphs - specifically
     single line paragraphs that appear to be fragments (end without proper sentence punctuation).
     """
-    result_nodes = []
+    return track_and_manage_records(classify_blocks(blocks))
+
+
+def track_and_manage_records(records):
+    """
+    Same as track_and_manage_blocks, for blocks already turned into Block
+    records by classify_blocks. Types and normalized paragraph text are read
+    from the records, never recomputed.
+    """
+    return list(iter_block_nodes(records))
 
-    i = 0
-    while i < len(blocks):
-        current_block = blocks[i]
-        current_type = block_to_block_type(current_block)
+
+def iter_block_nodes(records):
+    """
+    Lazy track_and_manage_records: yield the HTMLNodes for each block as
+    soon as the one-block lookahead used for paragraph merging allows.
+    """
+    records = iter(records)
+    current = next(records, None)
+
+    while current is not None:
+        following = next(records, None)
+        current_type = current.block_type
 
         if current_type is None:  # Skip empty blocks
-            i += 1
+            current = following
             continue
 
         # Special handling for consecutive paragraphs
         if current_type == BlockType.PARAGRAPH:
             # Check if this paragraph is a candidate for merging
             # Logic: if it's a single line and doesn't end with sentence-ending punctuation
-            current_text = re.sub(r"\s+", " ", current_block.strip())
+            current_text = current.normalized
             is_fragment = (
                 not current_text.endswith(".")
                 and not current_text.endswith("!")
@@ -371,16 +460,13 @@ def track_and_manage_blocks(blocks):
 
             # Look ahead to see if next block is also a paragraph
             has_next_paragraph = False
-            if (
-                i + 1 < len(blocks)
-                and block_to_block_type(blocks[i + 1]) == BlockType.PARAGRAPH
-            ):
+            if following is not None and following.block_type == BlockType.PARAGRAPH:
                 has_next_paragraph = True
 
             # Special case for whitespace_handling test
             special_whitespace_case = False
             if has_next_paragraph:
-                next_text = re.sub(r"\s+", " ", blocks[i + 1].strip())
+                next_text = following.normalized
                 if (
                     is_fragment
                     and not current_text.endswith(",")
@@ -399,47 +485,53 @@ def track_and_manage_blocks(blocks):
                 or next_text.lower() == "newlines"
             ):
                 # Merge this paragraph with the next one
-                combined_text = (
-                    current_text + " " + re.sub(r"\s+", " ", blocks[i + 1].strip())
-                )
-                result_nodes.append(process_paragraph_block(combined_text))
-                i += 2  # Skip next block since we've processed it
+                combined_text = current_text + " " + next_text
+                yield paragraph_node(combined_text)
+                # Skip next block since we've processed it
+                current = next(records, None)
+                continue
+            elif not PARAGRAPH_BREAK_RE.search(current.raw):
+                # A single paragraph: its normalized text is already known
+                yield paragraph_node(current_text)
             else:
                 # Process normally - split on multiple newlines
-                paragraph_segments = re.split(r"\n{2,}", current_block)
+                paragraph_segments = PARAGRAPH_BREAK_RE.split(current.raw)
                 for segment in paragraph_segments:
                     if segment.strip():  # Only process non-empty segments
-                        result_nodes.append(process_paragraph_block(segment))
-                i += 1
+                        yield process_paragraph_block(segment)
         elif current_type == BlockType.HEADING:
             # Process all heading levels
-            heading_lines = current_block.split("\n")
+            heading_lines = current.raw.split("\n")
             for line in heading_lines:
                 if line.strip():  # Skip empty lines
                     level = min(heading_size(line), 6)
                     content = line[level:].strip()
-                    result_nodes.append(
-                        ParentNode(f"h{level}", children=parse_nested_elements(content))
+                    yield ParentNode.trusted(
+                        f"h{level}", parse_nested_elements(content)
                     )
-            i += 1
         else:
             # Process other block types normally
-            result_nodes.append(get_block_parent(current_block, current_type))
-            i += 1
+            yield get_block_parent(current.raw, current_type, current.normalized)
 
-    return result_nodes
+        current = following
 
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, arena=False):
     """
     Converts markdown text into a single parent HTMLNode with nested structures
     representing the markdown blocks and inline elements.
+
+    With arena=True the document is built into a DocumentArena instead, one
+    top-level block at a time, so only a single block's nodes exist at once.
     """
-    # Step 1: Convert the markdown string into blocks
-    blocks = markdown_to_blocks(markdown)
+    if arena:
+        return markdown_to_arena(markdown)
+
+    # Step 1: Convert the markdown string into classified blocks
+    records = classify_blocks(markdown_to_blocks(markdown))
 
     # Step 2: Track and manage blocks to combine related blocks
-    processed_blocks = track_and_manage_blocks(blocks)
+    processed_blocks = track_and_manage_records(records)
 
     # Step 3: Create a parent HTMLNode (a `div`) to house all child blocks
     if not processed_blocks:
@@ -455,3 +547,43 @@ def markdown_to_html_node(markdown):
         )
 
     return ParentNode(tag="div", children=processed_blocks)
+
+
+def markdown_to_arena(markdown):
+    """
+    Build the DocumentArena of markdown: the same document as
+    markdown_to_html_node, with the div at index 0.
+    """
+    document = DocumentArena()
+    root = document.add("div", is_parent=True)
+    lines = markdown.splitlines() if markdown else []
+    records = iter_classified_blocks(iter_markdown_blocks(lines))
+    for node in iter_block_nodes(records):
+        document.add_node(node, root)
+    if len(document) == 1:
+        # Same placeholder markdown_to_html_node uses for empty documents
+        paragraph = document.add("p", parent=root, is_parent=True)
+        document.add(None, "", parent=paragraph)
+    return document
+
+
+def iter_markdown_html(lines):
+    """
+    Yield the HTML of a document read from any iterable of lines, one
+    top-level block at a time.
+
+    For the lines of a string text, the joined output equals
+    markdown_to_html_node(text).to_html(), but blocks are read, parsed and
+    rendered as they arrive, so memory is bounded by the largest block
+    rather than by the document.
+    """
+    yield "<div>"
+    empty = True
+    records = iter_classified_blocks(iter_markdown_blocks(lines))
+    for node in iter_block_nodes(records):
+        empty = False
+        yield node.to_html()
+    if empty:
+        # Same placeholder markdown_to_html_node uses for empty documents
+        yield "<p></p>"
+    yield "</div>"
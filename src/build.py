@@ -0,0 +1,438 @@
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from blocknode import markdown_to_html_node
+from htmlnode import escape_html
+from parse_cache import DEFAULT_MAX_SIZE, PARSER_MODULES, ParseCache, modules_version
+from precompress import GZIP_SUFFIX, Precompressor, file_sha256
+from static_sync import sync_static
+
+DEFAULT_CHUNK_SIZE = 16
+MARKDOWN_SUFFIX = ".md"
+BUILD_MANIFEST_NAME = ".build-manifest.json"
+
+# Modules whose code decides a page's bytes. Their source is hashed into
+# the generator version, so upgrading or editing any of them rebuilds every
+# page instead of relying on someone remembering to bump a number
+GENERATOR_MODULES = PARSER_MODULES + ["build"]
+
+# Used when the site has no template file of its own
+DEFAULT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{{ Title }}</title>
+    <link rel="stylesheet" href="/styles.css">
+</head>
+<body>
+{{ Content }}
+</body>
+</html>
+"""
+
+# Everything a worker needs to turn one source file into a page
+BuildSettings = namedtuple(
+    "BuildSettings", ["content_dir", "dest_dir", "template", "gzip_level", "cache_dir"]
+)
+# One page built by a worker; gzip is its precompress manifest entry and
+# cache_hit is None when there's no parse cache
+PageResult = namedtuple(
+    "PageResult",
+    ["source", "sha256", "worker", "size", "seconds", "gzip", "cache_hit"],
+)
+# A page that failed to build, with the error as text
+PageError = namedtuple("PageError", ["source", "message"])
+WorkerStats = namedtuple("WorkerStats", ["pages", "size", "seconds"])
+BuildReport = namedtuple(
+    "BuildReport",
+    [
+        "pages",
+        "size",
+        "seconds",
+        "workers",
+        "assets",
+        "skipped",
+        "removed",
+        "cache_hits",
+        "cache_misses",
+        "errors",
+    ],
+)
+
+
+class TemplatedPage:
+    """A page's HTML node wrapped in the template, rendered as a stream."""
+
+    def __init__(self, template, title, node):
+        head, _, tail = template.partition("{{ Content }}")
+        title = escape_html(title)
+        self.head = head.replace("{{ Title }}", title)
+        self.tail = tail.replace("{{ Title }}", title)
+        self.node = node
+
+    def iter_html(self, encoding="utf-8"):
+        yield self.head.encode(encoding)
+        yield from self.node.iter_html(encoding)
+        yield self.tail.encode(encoding)
+
+
+def extract_title(markdown, default):
+    """Return the text of the first "# " heading, or default."""
+    for line in markdown.splitlines():
+        line = line.strip()
+        if line.startswith("# "):
+            return line[2:].strip()
+    return default
+
+
+def load_template(template_path):
+    if template_path is None:
+        return DEFAULT_TEMPLATE
+    with open(template_path, encoding="utf-8") as fp:
+        return fp.read()
+
+
+def find_pages(content_dir):
+    """
+    Return the markdown files under content_dir as paths relative to it,
+    sorted so every build sees them in the same order.
+    """
+    if not os.path.isdir(content_dir):
+        raise FileNotFoundError(f"content directory not found: {content_dir}")
+    pages = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(MARKDOWN_SUFFIX):
+                path = os.path.join(root, name)
+                pages.append(os.path.relpath(path, content_dir))
+    return pages
+
+
+def page_dest(source):
+    return source[: -len(MARKDOWN_SUFFIX)] + ".html"
+
+
+def generator_version():
+    """Hash of the generator's own source, see GENERATOR_MODULES."""
+    return modules_version(GENERATOR_MODULES)
+
+
+class BuildManifest:
+    """
+    Records the content hash each page was built from, along with the
+    inputs every page shares: the generator version, the template and the
+    gzip level. A page is current if its source hash is unchanged and its
+    output still exists; if any shared input changed, no page is.
+
+    Stored in the output directory. Pages recorded with record() replace
+    the old entries when save() is called, so sources that no longer exist
+    drop out.
+    """
+
+    def __init__(self, dest_dir, inputs):
+        self.path = os.path.join(dest_dir, BUILD_MANIFEST_NAME)
+        self.inputs = inputs
+        self.pages = {}
+        self.valid = False
+        self.built = {}
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                data = json.load(fp)
+            self.pages = data["pages"]
+            self.valid = data["inputs"] == inputs
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+
+    def is_current(self, source, digest):
+        return self.valid and self.pages.get(source) == digest
+
+    def removed(self, sources):
+        """Sources built last time that are no longer in sources."""
+        return sorted(set(self.pages).difference(sources))
+
+    def record(self, source, digest):
+        self.built[source] = digest
+
+    def forget(self, source):
+        self.built.pop(source, None)
+
+    def failed(self, source):
+        """
+        Keep a page that failed to build in the manifest without a hash:
+        it's never current, so the next build retries it, and its old
+        output is still removed if the source is deleted.
+        """
+        self.built[source] = None
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        # json.dumps and one write: json.dump streams through the much
+        # slower pure Python encoder
+        data = json.dumps(
+            {"inputs": self.inputs, "pages": self.built}, indent=2, sort_keys=True
+        )
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(data)
+        os.replace(tmp_path, self.path)
+
+
+def build_inputs(template, gzip_level):
+    """The BuildManifest inputs every page of a build shares."""
+    return {
+        "generator": generator_version(),
+        "template": hashlib.sha256(template.encode("utf-8")).hexdigest(),
+        "gzip_level": gzip_level,
+    }
+
+
+# Per-process state, set up once by init_worker rather than shipped with
+# every page
+_settings = None
+_precompressor = None
+_parse_cache = None
+
+
+def init_worker(settings):
+    global _settings, _precompressor, _parse_cache
+    _settings = settings
+    _precompressor = None
+    if settings.gzip_level is not None:
+        _precompressor = Precompressor(settings.dest_dir, settings.gzip_level)
+    _parse_cache = None
+    if settings.cache_dir is not None:
+        _parse_cache = ParseCache(settings.cache_dir)
+
+
+def build_page(source):
+    """Convert one markdown file to its HTML page; runs in a worker."""
+    start = time.perf_counter()
+    settings = _settings
+    with open(os.path.join(settings.content_dir, source), "rb") as fp:
+        data = fp.read()
+    # Hash what was actually built, in case the file changed since the
+    # build looked at it
+    digest = hashlib.sha256(data).hexdigest()
+    markdown = data.decode("utf-8")
+    title = extract_title(markdown, os.path.splitext(os.path.basename(source))[0])
+    cache_hit = None
+    if _parse_cache is None:
+        node = markdown_to_html_node(markdown)
+    else:
+        # A cached document renders straight from its arena, with no nodes
+        # built at all
+        node = _parse_cache.load(digest)
+        cache_hit = node is not None
+        if not cache_hit:
+            node = markdown_to_html_node(markdown)
+            _parse_cache.store(digest, node)
+    page = TemplatedPage(settings.template, title, node)
+    dest = os.path.join(settings.dest_dir, page_dest(source))
+    entry = None
+    if _precompressor is not None:
+        _precompressor.write_page(page, dest)
+        entry = _precompressor.manifest[_precompressor.key(dest)]
+    else:
+        with open(dest, "wb") as fp:
+            for chunk in page.iter_html():
+                fp.write(chunk)
+    size = os.path.getsize(dest)
+    seconds = time.perf_counter() - start
+    return PageResult(source, digest, os.getpid(), size, seconds, entry, cache_hit)
+
+
+def try_build_page(source):
+    """
+    build_page, returning a PageError instead of raising, so one broken
+    page doesn't take the rest of the build down with it.
+    """
+    try:
+        return build_page(source)
+    # Malformed markdown can fail in any number of ways
+    except Exception as e:
+        return PageError(source, str(e) or type(e).__name__)
+
+
+def remove_page(dest, precompressor=None):
+    """Delete a page whose source is gone, along with its .gz sibling."""
+    for path in (dest, dest + GZIP_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    if precompressor is not None:
+        precompressor.forget(dest)
+
+
+def build_site(
+    content_dir="content",
+    dest_dir="dist",
+    static_dir="public",
+    template_path=None,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    gzip_level=None,
+    force=False,
+    cache_dir=None,
+    cache_size=DEFAULT_MAX_SIZE,
+    link_static=False,
+):
+    """
+    Build every markdown page under content_dir into dest_dir, spread over
+    a pool of worker processes, then sync static_dir alongside.
+
+    Builds are incremental: a BuildManifest in dest_dir tells which pages
+    are unchanged since the last build, and those are neither parsed nor
+    written. Pages whose source was deleted are removed. force=True
+    rebuilds every page.
+
+    With a cache_dir, parsed documents are kept in a ParseCache there, so
+    pages regenerated from an unchanged source (after a template change,
+    say) aren't parsed again. The cache is pruned back to cache_size bytes
+    whenever the build added to it.
+
+    Static files are synced by a StaticSync, which only copies files that
+    changed, hardlinking them instead with link_static=True, and deletes
+    ones no longer in static_dir.
+
+    Pages are independent, so they're handed to the pool chunk_size at a
+    time and each worker writes its own output files. A page's bytes
+    depend only on its source and the template, never on which worker
+    built it or in what order, so the output is identical for any worker
+    count. With workers=1 the pages are built in this process.
+
+    A page that fails to build is reported in the BuildReport's errors and
+    recorded as failed in the manifest, so the next build tries it again;
+    the rest of the build carries on.
+    """
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1 or chunk_size < 1:
+        raise ValueError("workers and chunk_size must be at least 1")
+    sources = find_pages(content_dir)
+    template = load_template(template_path)
+    settings = BuildSettings(content_dir, dest_dir, template, gzip_level, cache_dir)
+    manifest = BuildManifest(dest_dir, build_inputs(template, gzip_level))
+
+    # Hashing a source is far cheaper than parsing it, so only the pages
+    # whose hash changed (or whose output went missing) go to the workers
+    stale = []
+    for source in sources:
+        digest = file_sha256(os.path.join(content_dir, source))
+        dest = os.path.join(dest_dir, page_dest(source))
+        if (
+            not force
+            and manifest.is_current(source, digest)
+            and os.path.exists(dest)
+            and (gzip_level is None or os.path.exists(dest + GZIP_SUFFIX))
+        ):
+            manifest.record(source, digest)
+        else:
+            stale.append(source)
+
+    # Create every output directory up front so workers never race on it
+    for directory in sorted({os.path.dirname(page_dest(s)) for s in stale}):
+        os.makedirs(os.path.join(dest_dir, directory), exist_ok=True)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    if not stale:
+        results = []
+    elif workers == 1:
+        init_worker(settings)
+        results = [try_build_page(source) for source in stale]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(settings,)
+        ) as executor:
+            results = list(executor.map(try_build_page, stale, chunksize=chunk_size))
+    errors = [result for result in results if isinstance(result, PageError)]
+    if errors:
+        results = [result for result in results if not isinstance(result, PageError)]
+        for error in errors:
+            manifest.failed(error.source)
+    cache_hits = cache_misses = 0
+    for result in results:
+        manifest.record(result.source, result.sha256)
+        if result.cache_hit is not None:
+            cache_hits += result.cache_hit
+            cache_misses += not result.cache_hit
+    if cache_misses:
+        ParseCache(cache_dir).prune(cache_size)
+
+    precompressor = None
+    if gzip_level is not None:
+        # Workers decided from the manifest as it was when the build
+        # started; fold their entries back in
+        precompressor = Precompressor(dest_dir, gzip_level)
+        for result in results:
+            dest = os.path.join(dest_dir, page_dest(result.source))
+            precompressor.manifest[precompressor.key(dest)] = result.gzip
+    else:
+        # Anything left from a build with gzip on would go stale
+        Precompressor(dest_dir).clear()
+    removed = manifest.removed(sources)
+    for source in removed:
+        remove_page(os.path.join(dest_dir, page_dest(source)), precompressor)
+    generated = [os.path.normpath(page_dest(source)) for source in sources]
+    assets = sync_static(static_dir, dest_dir, precompressor, generated, link_static)
+    if precompressor is not None:
+        precompressor.save()
+    manifest.save()
+
+    per_worker = {}
+    for result in results:
+        pages, size, seconds = per_worker.get(result.worker, (0, 0, 0.0))
+        per_worker[result.worker] = WorkerStats(
+            pages + 1, size + result.size, seconds + result.seconds
+        )
+    return BuildReport(
+        len(results),
+        sum(result.size for result in results),
+        time.perf_counter() - start,
+        per_worker,
+        assets,
+        len(sources) - len(stale),
+        len(removed),
+        cache_hits,
+        cache_misses,
+        errors,
+    )
+
+
+def format_report(report):
+    """
+    Return the build summary, pages that failed and per-worker throughput
+    as text lines.
+    """
+    assets = report.assets
+    lines = [
+        f"built {report.pages} pages ({report.size / 2**20:.1f} MiB), skipped "
+        f"{report.skipped} unchanged and removed {report.removed} in "
+        f"{report.seconds:.2f}s",
+        f"static files: copied {assets.copied} ({assets.copied_bytes / 2**20:.1f} "
+        f"MiB), skipped {assets.skipped} unchanged "
+        f"({assets.skipped_bytes / 2**20:.1f} MiB), removed {assets.removed}",
+    ]
+    if report.cache_hits or report.cache_misses:
+        lines.append(
+            f"parse cache: {report.cache_hits} hits, {report.cache_misses} misses"
+        )
+    for error in report.errors:
+        lines.append(f"error: {error.source}: {error.message}")
+    lines.append(
+        f"{'worker':>8} {'pages':>7} {'MiB':>8} {'busy s':>8} {'pages/s':>9} {'MiB/s':>7}"
+    )
+    for number, worker in enumerate(sorted(report.workers), 1):
+        stats = report.workers[worker]
+        busy = stats.seconds or 1e-9
+        lines.append(
+            f"{number:>8} {stats.pages:>7} {stats.size / 2**20:>8.2f} "
+            f"{stats.seconds:>8.2f} {stats.pages / busy:>9.1f} "
+            f"{stats.size / 2**20 / busy:>7.2f}"
+        )
+    return lines
@@ -1,3 +1,40 @@
+import codecs
+import sys
+from itertools import chain
+
+# Number of fragments ParentNode.iter_html gathers before yielding a chunk
+CHUNK_PARTS = 512
+
+# Hits and misses of memoizing ParentNodes, across all renders
+RENDER_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# Attribute values are escaped in one str.translate pass
+ATTRIBUTE_ESCAPES = str.maketrans({'"': "&quot;"})
+
+
+class SafeString(str):
+    """Text that is already valid HTML, emitted by leaves without escaping."""
+
+    __slots__ = ()
+
+
+def escape_html(text):
+    """Escape &, < and > in text, returning it as a SafeString."""
+    if type(text) is SafeString:
+        return text
+    return SafeString(_escape_text(text))
+
+
+def _escape_text(text):
+    # Chained replace beats str.translate and re.sub here: translate takes a
+    # slow per-character path for multi-character replacements and sub calls
+    # back into Python per match. & goes first so the entities aren't
+    # escaped again
+    if type(text) is SafeString:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
 SELF_CLOSING_TAGS = {
     "img",
     "br",
@@ -16,54 +53,171 @@ SELF_CLOSING_TAGS = {
 
 
 class HTMLNode:
+    # Pages allocate tens of thousands of nodes, so keep them free of a
+    # per-instance __dict__
+    __slots__ = ("_tag", "_value", "_children", "_props", "_props_html", "_parents")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         if props is not None and not isinstance(props, dict):
             raise TypeError("props must be a dict")
-        self.tag = tag
-        self.value = value
-        self.children = children
-        self.props = props
+        self._tag = tag
+        self._value = value
+        self._children = children
+        self._props = props
+        self._props_html = None
+        # Parents to notify of changes while the node sits under a
+        # memoizing ParentNode, None while it doesn't
+        self._parents = None
+
+    @property
+    def tag(self):
+        return self._tag
+
+    @tag.setter
+    def tag(self, tag):
+        self._tag = tag
+        self._changed()
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._changed()
+
+    @property
+    def children(self):
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        if self._parents is not None:
+            for child in self._children or ():
+                if isinstance(child, HTMLNode) and child._parents:
+                    child._parents.remove(self)
+            for child in children or ():
+                _track(child, self)
+        self._children = children
+        self._changed()
+
+    @property
+    def props(self):
+        return self._props
+
+    @props.setter
+    def props(self, props):
+        # Reassigning props drops the cached attribute string; mutating the
+        # dict in place doesn't, so assign a new dict to change attributes
+        self._props = props
+        self._props_html = None
+        self._changed()
+
+    def _changed(self):
+        # Drop the cached HTML of every memoizing node this one renders
+        # into. A memoizing node without a cache can't have a cached
+        # ancestor (rendering the ancestor would have filled it), so the
+        # walk stops there
+        if self._parents is None:
+            return
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, ParentNode) and node._memoize:
+                if node._html is None and node is not self:
+                    continue
+                node._html = None
+            pending.extend(node._parents)
 
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self, encoding="utf-8"):
+        """Yield the node's HTML as encoded chunks in document order."""
+        yield self.to_html().encode(encoding)
+
+    def write_html(self, fp, encoding="utf-8"):
+        """
+        Write the node's HTML to a binary file-like object (an open file, a
+        gzip stream, a socket file) chunk by chunk, without building the
+        whole document first. Returns the number of bytes written.
+        """
+        written = 0
+        for chunk in self.iter_html(encoding):
+            fp.write(chunk)
+            written += len(chunk)
+        return written
+
     def props_to_html(self):
-        if self.props is None:
-            return ""
-        return "".join(
-            list(
-                map(
-                    lambda item: f' {item[0]}="{item[1].replace('"', "&quot;" )}"',
-                    self.props.items(),
+        # Serialized and escaped once per node, then reused by every render
+        html = self._props_html
+        if html is None:
+            if self._props:
+                html = "".join(
+                    f' {name}="{value.translate(ATTRIBUTE_ESCAPES)}"'
+                    for name, value in self._props.items()
                 )
-            )
-        )
+            else:
+                html = ""
+            self._props_html = html
+        return html
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
+def _track(node, parent):
+    # Record parent on node and, if node wasn't tracked yet, on everything
+    # below it, so a change anywhere in a memoized subtree reaches the
+    # memoizing nodes above it. Tracked nodes already have tracked children
+    pending = [(node, parent)]
+    while pending:
+        node, parent = pending.pop()
+        if node._parents is not None:
+            node._parents.append(parent)
+            continue
+        node._parents = [parent]
+        if isinstance(node, ParentNode):
+            pending.extend((child, node) for child in node._children)
+
+
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         if value is None and tag not in SELF_CLOSING_TAGS:
             raise ValueError("value is required for non-self-cloding tags")
         super().__init__(tag=tag, value=value, children=None, props=props)
 
     def to_html(self):
-        if self.tag is None:
-            return self.value
-        if self.tag in SELF_CLOSING_TAGS:
-            return f"<{self.tag}{self.props_to_html()} />"
-        if self.props:
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-        return f"<{self.tag}>{self.value}</{self.tag}>"
+        # Text and code are escaped on the way out; SafeString values are
+        # already HTML and pass through. Most text has nothing to escape, so
+        # check inline before paying for a call
+        tag, value = self._tag, self._value
+        if not isinstance(value, str):
+            # Numbers and other values render as their str(), escaped
+            value = str(value)
+        if tag is None:
+            if "&" in value or "<" in value or ">" in value:
+                return _escape_text(value)
+            return value
+        if tag in SELF_CLOSING_TAGS:
+            return f"<{tag}{self.props_to_html()} />"
+        if "&" in value or "<" in value or ">" in value:
+            value = _escape_text(value)
+        if self._props:
+            return f"<{tag}{self.props_to_html()}>{value}</{tag}>"
+        return f"<{tag}>{value}</{tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
-    def __init__(self, tag, children, props=None):
+    __slots__ = ("_memoize", "_html")
+
+    def __init__(self, tag, children, props=None, memoize=False):
         if tag is None:
             raise ValueError("tag is required for ParentNode")
         if not children:
@@ -74,12 +228,135 @@ class ParentNode(HTMLNode):
         if not filtered_children:
             raise ValueError("all children are None")
         super().__init__(tag=tag, value=None, children=filtered_children, props=props)
+        self._memoize = False
+        self._html = None
+        if memoize:
+            self.memoize_subtree(recursive=False)
+
+    @classmethod
+    def trusted(cls, tag, children, props=None):
+        """
+        Build a ParentNode without the constructor's checks, for internal
+        callers whose children are already a fresh, non-empty list of nodes
+        with no None in it. The list is used as-is, not copied.
+        """
+        node = cls.__new__(cls)
+        node._tag = tag
+        node._value = None
+        node._children = children
+        node._props = props
+        node._props_html = None
+        node._parents = None
+        node._memoize = False
+        node._html = None
+        return node
+
+    def memoize_subtree(self, recursive=True):
+        """
+        Cache this node's rendered HTML, and with recursive that of every
+        ParentNode below it, so unchanged subtrees render in O(1). A cache
+        is dropped when tag, props, children or a leaf value is reassigned
+        anywhere beneath it; in-place edits of a children list or props
+        dict aren't seen.
+        """
+        marked = []
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            if not node._memoize:
+                node._memoize = True
+                marked.append(node)
+            if recursive:
+                pending.extend(
+                    child for child in node._children if isinstance(child, ParentNode)
+                )
+        if self._parents is None:
+            self._parents = []
+            for child in self._children:
+                _track(child, self)
+        # _changed stops at a memoizing node without a cache, taking it to
+        # mean nothing above is cached either. A node that starts memoizing
+        # under an already cached ancestor would break that, so clear those
+        # ancestors now; parents come first in marked, so each walk can stop
+        # at the nodes already handled
+        for node in marked:
+            node._changed()
 
     def to_html(self):
-        par_str = ""
-        for child in self.children:
-            par_str += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{par_str}</{self.tag}>"
+        if self._html is not None:
+            RENDER_CACHE_STATS["hits"] += 1
+            return self._html
+        return "".join(chain.from_iterable(self._iter_parts(sys.maxsize)))
+
+    def iter_html(self, encoding="utf-8"):
+        """
+        Yield the node's HTML as encoded chunks in document order, each
+        built from about CHUNK_PARTS fragments, so only one chunk is held
+        in memory at a time.
+        """
+        # One encoder across all chunks, so encodings with a BOM (utf-16,
+        # utf-32) write it once rather than at the start of every chunk
+        encode = codecs.getincrementalencoder(encoding)().encode
+        for parts in self._iter_parts(CHUNK_PARTS):
+            yield encode("".join(parts))
+        tail = encode("", final=True)
+        if tail:
+            yield tail
+
+    def _iter_parts(self, limit):
+        # Walk the tree with an explicit stack instead of recursing, so deep
+        # trees can't hit the recursion limit, and collect fragments in a
+        # list so each byte is copied once by a join rather than once per
+        # ancestor. The list is handed out whenever it holds limit fragments.
+        # A memoizing node's fragments are joined into its cache when it
+        # closes, unless a hand-out split them
+        stats = RENDER_CACHE_STATS
+        parts = []
+        append = parts.append
+        handed_out = 0
+        # Suspended ancestors as (children iterator, closing tag, capture),
+        # where capture is None or, for a memoizing node, (node, index of
+        # its first fragment, handed_out when it opened)
+        stack = []
+        children, closing, capture = iter((self,)), None, None
+        while True:
+            for child in children:
+                if isinstance(child, ParentNode):
+                    html = child._html
+                    if html is None:
+                        # Suspend this parent and descend into the child
+                        stack.append((children, closing, capture))
+                        if child._memoize:
+                            stats["misses"] += 1
+                            capture = (child, len(parts), handed_out)
+                        else:
+                            capture = None
+                        append(f"<{child._tag}{child.props_to_html()}>")
+                        children = iter(child._children)
+                        closing = f"</{child._tag}>"
+                        break
+                    stats["hits"] += 1
+                    append(html)
+                else:
+                    append(child.to_html())
+                if len(parts) >= limit:
+                    yield parts
+                    parts = []
+                    append = parts.append
+                    handed_out += 1
+            else:
+                if not stack:
+                    yield parts
+                    return
+                # Children exhausted: close the element and resume its parent
+                append(closing)
+                if capture is not None:
+                    node, start, opened = capture
+                    if opened == handed_out:
+                        html = "".join(parts[start:])
+                        parts[start:] = (html,)
+                        node._html = html
+                children, closing, capture = stack.pop()
 
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -1,5 +1,4 @@
-import re
-
+from patterns import IMAGE_OPEN_RE, LINK_OPEN_RE, PAREN_RE
 from textnode import TextNode, TextType
 
 
@@ -7,145 +6,240 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     if not delimiter:
         raise Exception("Invalid Markdown Syntax")
+    length = len(delimiter)
     for node in old_nodes:
-        length = len(delimiter)
         if node.text_type is not TextType.TEXT:
             new_nodes.append(node)
             continue
 
         # Find first delimiter
-        start = node.text.find(delimiter)
+        text = node.text
+        start = text.find(delimiter)
         if start == -1:
             new_nodes.append(node)
             continue
 
-        # Find matching delimiter
-        end = node.text.find(delimiter, start + length)
-        if end == -1:
-            # Still raise exception for unmatched delimiter
-            raise Exception("Invalid Markdown Syntax")
-
-        # Process text before first delimiter
-        if start > 0:
-            new_nodes.append(TextNode(node.text[:start], TextType.TEXT))
-
-        # Process delimited text
-        middle = node.text[(start + length) : end]
-        if text_type != TextType.CODE and middle.strip() == "":
-            middle = ""
-        new_nodes.append(TextNode(middle, text_type))
-
-        # Recursively process any remaining text
-        if end + length < len(node.text):
-            # The key change: recursively process the remaining text
-            remaining_text = node.text[(end + length) :]
-            # Create a temporary node with the remaining text
-            temp_node = TextNode(remaining_text, TextType.TEXT)
-            # Recursively process this node with the same delimiter and text type
-            recursive_result = split_nodes_delimiter([temp_node], delimiter, text_type)
-            # Add the results to our output
-            new_nodes.extend(recursive_result)
+        # Walk the delimiter pairs with a cursor instead of re-splitting the
+        # remaining text, so each node is scanned once
+        cursor = 0
+        while start != -1:
+            # Find matching delimiter
+            end = text.find(delimiter, start + length)
+            if end == -1:
+                # Still raise exception for unmatched delimiter
+                raise Exception("Invalid Markdown Syntax")
+
+            # Process text before the opening delimiter
+            if start > cursor:
+                new_nodes.append(TextNode(text[cursor:start], TextType.TEXT))
+
+            # Process delimited text
+            middle = text[(start + length) : end]
+            if text_type != TextType.CODE and middle.strip() == "":
+                middle = ""
+            new_nodes.append(TextNode(middle, text_type))
+
+            cursor = end + length
+            start = text.find(delimiter, cursor)
+
+        # Process any remaining text
+        if cursor < len(text):
+            new_nodes.append(TextNode(text[cursor:], TextType.TEXT))
 
     return new_nodes
 
 
 def extract_markdown_images(text):
-    # Find potential image markdown patterns
-    potential_matches = re.finditer(r"!\[(.*?)\]\(", text)
+    return [(alt_text, url) for _, _, alt_text, url in find_markdown_images(text)]
 
-    results = []
-    for match in potential_matches:
-        alt_text = match.group(1)
-        start_idx = match.end()
 
-        # Count parentheses to find the matching closing one
-        paren_count = 1
-        for i in range(start_idx, len(text)):
-            if text[i] == "(":
-                paren_count += 1
-            elif text[i] == ")":
-                paren_count -= 1
+def extract_markdown_links(text):
+    return [(link_text, url) for _, _, link_text, url in find_markdown_links(text)]
 
-            if paren_count == 0:
-                results.append((alt_text, text[start_idx:i]))
-                break
 
-    return results
+def find_markdown_images(text):
+    """
+    Find every image in text as (start, end, alt_text, url).
 
+    start and end are offsets of the whole ![alt](url) span, so callers can
+    slice around it instead of searching for the rebuilt marker.
+    """
+    return _find_bracket_spans(text, 0, len(text), IMAGE_OPEN_RE, None)
 
-def extract_markdown_links(text):
-    # Find potential link markdown patterns
-    potential_matches = re.finditer(r"(?<!!)\[(.*?)\]\(", text)
 
-    results = []
-    for match in potential_matches:
-        link_text = match.group(1)
-        start_idx = match.end()
+def find_markdown_links(text):
+    """Find every link in text as (start, end, link_text, url)."""
+    return _find_bracket_spans(text, 0, len(text), LINK_OPEN_RE, None)
 
-        # Count parentheses to find the matching closing one
-        paren_count = 1
-        for i in range(start_idx, len(text)):
-            if text[i] == "(":
-                paren_count += 1
-            elif text[i] == ")":
-                paren_count -= 1
 
-            if paren_count == 0:
-                results.append((link_text, text[start_idx:i]))
-                break
+def split_nodes_image(old_nodes):
+    return _split_nodes_at_spans(old_nodes, find_markdown_images, TextType.IMAGE)
+
 
-    return results
+def split_nodes_link(old_nodes):
+    return _split_nodes_at_spans(old_nodes, find_markdown_links, TextType.LINK)
 
 
-def split_nodes_image(old_nodes):
+def _split_nodes_at_spans(old_nodes, find_spans, text_type):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        images = extract_markdown_images(node.text)
-        if not images:
+        spans = find_spans(node.text)
+        if not spans:
             new_nodes.append(node)
             continue
-        current_text = node.text
-        for text, link in images:
-            link_marker = f"![{text}]({link})"
-            sections = current_text.split(link_marker, 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.IMAGE, link))
-            if len(sections) > 1:
-                current_text = sections[1]
-            else:
-                current_text = ""
-
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+        # Slice the text around the span offsets, once per segment
+        pieces = []
+        _emit_bracket_spans(node.text, (0, len(node.text)), spans, text_type, pieces)
+        for piece in pieces:
+            if type(piece) is tuple:
+                piece = TextNode(node.text[piece[0] : piece[1]], TextType.TEXT)
+            new_nodes.append(piece)
     return new_nodes
 
 
-def split_nodes_link(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
+# Delimiters in the order text_to_textnodes has always applied them
+INLINE_DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
+def lex_inline_markdown(text):
+    """
+    Split text into TextNodes working on offsets into the original string.
+
+    Image and link spans are found first, then bold, italic and code
+    delimiters are resolved inside the plain-text ranges left between them
+    with bounded str.find calls. Nothing is re-split or copied on the way:
+    the only strings built are the ones that end up in the returned nodes.
+    The result is the same node sequence (and the same "Invalid Markdown
+    Syntax" errors) as running split_nodes_image, split_nodes_link and
+    split_nodes_delimiter in turn.
+    """
+    if "](" in text:
+        pieces = _lex_brackets(text)
+    else:
+        pieces = [(0, len(text))]
+
+    for delimiter, text_type in INLINE_DELIMITERS:
+        if delimiter not in text:
             continue
-        links = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
-            continue
-        current_text = node.text
-        for alt, link in links:
-            link_marker = f"[{alt}]({link})"
-            sections = current_text.split(link_marker, 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.LINK, link))
-            if len(sections) > 1:
-                current_text = sections[1]
+        width = len(delimiter)
+        split_pieces = []
+        for piece in pieces:
+            if type(piece) is not tuple:
+                split_pieces.append(piece)
+                continue
+            cursor, hi = piece
+            start = text.find(delimiter, cursor, hi)
+            if start == -1:
+                split_pieces.append(piece)
+                continue
+            while start != -1:
+                end = text.find(delimiter, start + width, hi)
+                if end == -1:
+                    raise Exception("Invalid Markdown Syntax")
+                if start > cursor:
+                    split_pieces.append((cursor, start))
+                middle = text[start + width : end]
+                if text_type != TextType.CODE and middle.strip() == "":
+                    middle = ""
+                split_pieces.append(TextNode(middle, text_type))
+                cursor = end + width
+                start = text.find(delimiter, cursor, hi)
+            if cursor < hi:
+                split_pieces.append((cursor, hi))
+        pieces = split_pieces
+
+    return [
+        (
+            TextNode(text[piece[0] : piece[1]], TextType.TEXT)
+            if type(piece) is tuple
+            else piece
+        )
+        for piece in pieces
+    ]
+
+
+def _lex_brackets(text):
+    closes = paren_matches(text)
+    # Pieces are (start, end) offsets of plain text or finished TextNodes
+    pieces = [(0, len(text))]
+    for pattern, text_type in (
+        (IMAGE_OPEN_RE, TextType.IMAGE),
+        (LINK_OPEN_RE, TextType.LINK),
+    ):
+        split_pieces = []
+        for piece in pieces:
+            if type(piece) is not tuple:
+                split_pieces.append(piece)
+                continue
+            spans = _find_bracket_spans(text, piece[0], piece[1], pattern, closes)
+            if spans:
+                _emit_bracket_spans(text, piece, spans, text_type, split_pieces)
             else:
-                current_text = ""
-
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
-    return new_nodes
+                split_pieces.append(piece)
+        pieces = split_pieces
+    return pieces
+
+
+def _find_bracket_spans(text, lo, hi, pattern, closes):
+    # Candidate "[...](" openers come from one pattern scan over text[lo:hi];
+    # each url then ends at the ")" matching its "(", looked up in a table
+    # built once for the whole text, so no candidate rescans the tail.
+    spans = []
+    for match in pattern.finditer(text, lo, hi):
+        if closes is None:
+            closes = paren_matches(text)
+        url_start = match.end()
+        close = closes.get(url_start - 1)
+        if close is not None and close < hi:
+            spans.append(
+                (match.start(), close + 1, match.group(1), text[url_start:close])
+            )
+    return spans
+
+
+def paren_matches(text):
+    """Map the offset of every "(" in text to the offset of its matching ")"."""
+    closes = {}
+    stack = []
+    for match in PAREN_RE.finditer(text):
+        if match.group() == "(":
+            stack.append(match.start())
+        elif stack:
+            closes[stack.pop()] = match.start()
+    return closes
+
+
+def _emit_bracket_spans(text, piece, spans, text_type, out):
+    cursor, hi = piece
+    drifted = False
+    for start, end, label, url in spans:
+        if (
+            drifted
+            or start < cursor
+            # A link marker can also follow an "!" the pattern skipped
+            or text_type == TextType.LINK
+            and text.find("![", max(cursor - 1, 0), start) != -1
+        ):
+            # Overlapping match (an image inside a url) or an identical
+            # marker the pattern skipped: markers used to be found by
+            # searching the remaining text, so keep doing that until the
+            # match lines up with its offsets again
+            found = text.find(text[start:end], cursor, hi)
+            drifted = found != start
+            if found == -1:
+                start = end = hi
+            else:
+                start, end = found, found + (end - start)
+        if start > cursor:
+            out.append((cursor, start))
+        out.append(TextNode(label, text_type, url))
+        cursor = end
+    if cursor < hi:
+        out.append((cursor, hi))
@@ -1,177 +1,171 @@
+import argparse
 import sys
-from textnode import TextNode, TextType
-from htmlnode import HTMLNode, LeafNode, ParentNode
-from text_to_nodes import text_to_textnodes
-from block_markdown import markdown_to_blocks
-from blocknode import markdown_to_html_node
-from inline_markdown import (
-    split_nodes_delimiter,
-    split_nodes_image,
-    split_nodes_link,
-    extract_markdown_images,
-    extract_markdown_links,
-)
-
-
-def main():
-    print("You pass butter")
-
-    # md = """
-    # > - Item 1
-    # > - Item 2 with **bold** text
-    # """
-    # node = markdown_to_html_node(md)
-    # print(node.to_html())
-    # print("<div><blockquote><ul><li>Item 1</li><li>Item 2 with <b>bold</b> text</li></ul></blockquote></div>")
-
-    # # Case 1: Debug blockquote
-    # md_1 = """
-    # > This is a blockquote with multiple lines and some **bold** and _italic_ text and even some `code` too
-    # """
-    # node_1 = markdown_to_html_node(md_1)
-    # print("Case 1 - Blockquote:\n", node_1.to_html())
-
-    # # Case 2: Debug consecutive same blocks
-    # md_2 = """
-    # # First Heading
-
-    # # Second Heading
-
-    # > First quote
-
-    # > Second quote
-    # """
-    # node_2 = markdown_to_html_node(md_2)
-    # print("\nCase 2 - Consecutive Same Blocks:\n", node_2.to_html())
-
-    # # md = """
-    # # #
-
-    # # >
-
-    # # ```
-    # # ```
-
-    # # -
-    # # """
-    # # node = markdown_to_html_node(md)
-    # # print("\nCase 3 - Empty Blocks:\n", node.to_html())
-
-    # # Case 4: Debug mixed content
-    # md_4 = """
-    # # Document Title
-
-    # > Important quote with formatting in **bold**
-
-    # Regular paragraph.
-    # ```
-    # code block
-    # with multiple lines
-    # ```
-
-    # - List item 1
-    # - List item 2
-    # """
-    # node_4 = markdown_to_html_node(md_4)
-    # print("\nCase 4 - Mixed Content:\n", node_4.to_html())
-
-    # # Case 5: Debug nested blockquotes
-    # md_5 = """
-    # > This is a blockquote
-
-    # > > Nested blockquote
-    # """
-    # node_5 = markdown_to_html_node(md_5)
-    # print("\nCase 5 - Nested Blockquotes:\n", node_5.to_html())
-
-    # # Case 6: Debug nested inline elements
-    # md_6 = """
-    # This is a paragraph with **bold text that contains `code` and _italic_ parts** inside it.
-    # """
-    # node_6 = markdown_to_html_node(md_6)
-    # print("\nCase 6 - Nested Inline Elements:\n", node_6.to_html())
-
-    # # Case 7: Debug whitespace handling
-    # md_7 = """
-    # # Heading with spaces
-
-    # Paragraph with  multiple   spaces  and
-
-    # newlines
-    # """
-    # node_7 = markdown_to_html_node(md_7)
-    # print("\nCase 7 - Whitespace Handling:\n", node_7.to_html())
-
-    # md = """
-    # ```python
-    # def hello_world():
-    #     print("Hello, world!")
-    # ```
-
-    # Next block here.
-    # """
-    # blocks = markdown_to_blocks(md)
-    # print(blocks)
-
-    # text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
-
-    # print(text_to_textnodes(text))
-
-    # text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif) and ![obi wan](https://i.imgur.com/fJRm4Vk.jpeg)"
-    # print(extract_markdown_images(text))
-
-    # text = "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)"
-    # print(extract_markdown_links(text))
-
-    # node = TextNode(
-    #     "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)",
-    #     TextType.TEXT,
-    # )
-    # new_nodes = split_nodes_link([node])
-    # print(new_nodes)
-
-    # [("to boot dev", "https://www.boot.dev"), ("to youtube", "https://www.youtube.com/@bootdotdev")]
-
-    # node = TextNode("This is text with some **very bold** words", TextType.TEXT)
-    # new_nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
-
-    # print(new_nodes)
-
-    # print(text_node_to_html_node(text_node))
-
-    # bob = TextNode("This is only a test", TextType.BOLD, "https://www.boot.dev")
-    # link = HTMLNode(
-    #     "a",
-    #     "blah blah blah blah",
-    #     "",
-    #     {
-    #         "href": "https://www.google.com",
-    #         "target": "_blank",
-    #     },
-    # )
-    # lief = LeafNode("p", "This is some text for this paragraph")
-    # link_test = LeafNode(
-    #     "a", "Clicky clicky!", {"href": "https://www.google.com", "target": "_blank"}
-    # )
-
-    # node = ParentNode(
-    #     "p",
-    #     [
-    #         LeafNode("b", "Bold text"),
-    #         LeafNode(None, "Normal text"),
-    #         LeafNode("i", "italic text"),
-    #         LeafNode(None, "Normal text"),
-    #     ],
-    # )
-
-    # print(bob)
-    # print(link)
-    # print(link.props_to_html())
-    # print(lief.to_html())
-    # print(link_test.to_html())
-
-    # print(node.to_html())
 
+from build import DEFAULT_CHUNK_SIZE, build_site, format_report
+from parse_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE, ParseCache
+from precompress import DEFAULT_LEVEL
+from watch import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL, Watcher
+
+MIB = 2**20
+
+
+def add_cache_arguments(parser):
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR, help="parse cache directory"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE // MIB,
+        help="parse cache size limit in MiB",
+    )
+
+
+def add_build_arguments(build):
+    build.add_argument("--content", default="content", help="markdown source dir")
+    build.add_argument("--dest", default="dist", help="output directory")
+    build.add_argument(
+        "--static", default="public", help="directory of files copied as-is"
+    )
+    build.add_argument("--template", help="page template (default: built in)")
+    build.add_argument(
+        "--workers", type=int, help="worker processes (default: CPU count)"
+    )
+    build.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="pages handed to a worker at a time",
+    )
+    build.add_argument(
+        "--gzip", action="store_true", help="also write precompressed .gz files"
+    )
+    build.add_argument(
+        "--gzip-level", type=int, default=DEFAULT_LEVEL, help="gzip level, 0-9"
+    )
+    build.add_argument(
+        "--link-static",
+        action="store_true",
+        help="hardlink static files into the output instead of copying",
+    )
+    add_cache_arguments(build)
+    build.add_argument(
+        "--no-cache", action="store_true", help="don't use the parse cache"
+    )
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="Build a static site from markdown."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    build = commands.add_parser("build", help="generate the site")
+    add_build_arguments(build)
+    build.add_argument(
+        "--force", action="store_true", help="rebuild pages even if unchanged"
+    )
+
+    watch = commands.add_parser(
+        "watch", help="build, then rebuild changed pages until interrupted"
+    )
+    add_build_arguments(watch)
+    watch.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="seconds between polls for changes",
+    )
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="seconds without changes to wait before rebuilding",
+    )
+
+    cache = commands.add_parser("cache", help="inspect or prune the parse cache")
+    cache_commands = cache.add_subparsers(dest="cache_command", required=True)
+    add_cache_arguments(cache_commands.add_parser("stats", help="show cache usage"))
+    add_cache_arguments(
+        cache_commands.add_parser(
+            "prune", help="evict least recently used entries down to --cache-size"
+        )
+    )
+    return parser
+
+
+def build_command(args):
+    report = build_site(
+        content_dir=args.content,
+        dest_dir=args.dest,
+        static_dir=args.static,
+        template_path=args.template,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        gzip_level=args.gzip_level if args.gzip else None,
+        force=args.force,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_size=args.cache_size * MIB,
+        link_static=args.link_static,
+    )
+    for line in format_report(report):
+        print(line)
+    if report.errors:
+        failed = ", ".join(error.source for error in report.errors)
+        print(f"error: {len(report.errors)} pages failed: {failed}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def watch_command(args):
+    watcher = Watcher(
+        content_dir=args.content,
+        dest_dir=args.dest,
+        static_dir=args.static,
+        template_path=args.template,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        gzip_level=args.gzip_level if args.gzip else None,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_size=args.cache_size * MIB,
+        link_static=args.link_static,
+        interval=args.interval,
+        debounce=args.debounce,
+    )
+    watcher.run()
+    return 0
+
+
+def cache_command(args):
+    cache = ParseCache(args.cache_dir)
+    if args.cache_command == "prune":
+        removed, freed = cache.prune(args.cache_size * MIB)
+        print(f"removed {removed} entries, freed {freed / MIB:.1f} MiB")
+        return 0
+    stats = cache.stats()
+    print(f"{args.cache_dir}: {stats.entries} entries, {stats.size / MIB:.1f} MiB")
+    print(f"limit: {args.cache_size} MiB")
+    print(
+        f"from other parser versions: {stats.stale} entries, "
+        f"{stats.stale_size / MIB:.1f} MiB"
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "build":
+            return build_command(args)
+        if args.command == "watch":
+            return watch_command(args)
+        if args.command == "cache":
+            return cache_command(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    parser.print_help()
     return 0
 
 
@@ -0,0 +1,140 @@
+import hashlib
+import os
+from collections import namedtuple
+
+from arena import DocumentArena
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "parse")
+DEFAULT_MAX_SIZE = 256 * 2**20
+ENTRY_SUFFIX = ".arena"
+
+# Modules whose code decides the parsed tree, plus this one, which decides
+# how it's stored. A change to any of them starts a fresh cache version
+PARSER_MODULES = [
+    "arena",
+    "block_markdown",
+    "blocknode",
+    "htmlnode",
+    "inline_markdown",
+    "parse_cache",
+    "patterns",
+    "text_to_nodes",
+    "textnode",
+]
+
+CacheEntry = namedtuple("CacheEntry", ["path", "version", "size", "mtime"])
+CacheStats = namedtuple("CacheStats", ["entries", "size", "stale", "stale_size"])
+
+
+def modules_version(names):
+    """Hash of the source of the named modules, which sit next to this one."""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in names:
+        with open(os.path.join(here, name + ".py"), "rb") as fp:
+            digest.update(fp.read())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Parsed documents on disk, keyed by the sha256 of their markdown and the
+    parser version, so a page whose output has to be regenerated (after a
+    template change, say) skips parsing when its source didn't change.
+
+    Entries are DocumentArenas in their to_bytes form, one file each, at
+    <cache_dir>/<version>/<hash[:2]>/<hash>.arena. Entries from other
+    parser versions are never read but stay until pruned. A hit touches
+    the entry's mtime, so prune() evicts the least recently used first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, version=None):
+        self.cache_dir = cache_dir
+        self.version = (version or modules_version(PARSER_MODULES))[:16]
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, digest):
+        return os.path.join(
+            self.cache_dir, self.version, digest[:2], digest + ENTRY_SUFFIX
+        )
+
+    def load(self, digest):
+        """Return the cached DocumentArena for digest, or None."""
+        path = self.path(digest)
+        try:
+            with open(path, "rb") as fp:
+                document = DocumentArena.from_bytes(fp.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, unreadable or corrupt entries are all just misses
+            self.misses += 1
+            return None
+        self.hits += 1
+        return document
+
+    def store(self, digest, node):
+        """Cache the parsed tree node (an HTMLNode) for digest."""
+        document = DocumentArena()
+        document.add_node(node)
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several workers may store the same entry at once; each writes its
+        # own temporary file and the last rename wins
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(document.to_bytes())
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """Yield a CacheEntry for every entry, of any version."""
+        for version_dir in _scandirs(self.cache_dir):
+            for shard in _scandirs(version_dir.path):
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        if entry.name.endswith(ENTRY_SUFFIX) and entry.is_file():
+                            stat = entry.stat()
+                            yield CacheEntry(
+                                entry.path,
+                                version_dir.name,
+                                stat.st_size,
+                                stat.st_mtime,
+                            )
+
+    def stats(self):
+        entries = size = stale = stale_size = 0
+        for entry in self.entries():
+            entries += 1
+            size += entry.size
+            if entry.version != self.version:
+                stale += 1
+                stale_size += entry.size
+        return CacheStats(entries, size, stale, stale_size)
+
+    def prune(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        Delete the least recently used entries until the cache holds at
+        most max_size bytes. Returns the number of entries and bytes freed.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry.mtime)
+        size = sum(entry.size for entry in entries)
+        removed = freed = 0
+        for entry in entries:
+            if size <= max_size:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            size -= entry.size
+            removed += 1
+            freed += entry.size
+        return removed, freed
+
+
+def _scandirs(path):
+    try:
+        with os.scandir(path) as entries:
+            return [entry for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        return []
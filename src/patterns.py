@@ -0,0 +1,23 @@
+import re
+
+# Every regular expression the block and inline parsers use, compiled once
+# at import time instead of going through the re module's small cache on
+# each call.
+
+# Block processors
+WHITESPACE_RE = re.compile(r"\s+")
+PARAGRAPH_BREAK_RE = re.compile(r"\n{2,}")
+ORDERED_ITEM_RE = re.compile(r"^\d+\.\s*(.*)")
+UNORDERED_ITEM_RE = re.compile(r"^[-\*]\s*(.*)")
+CODE_INFO_LINE_RE = re.compile(r"^.*?\n")
+
+# Nested inline elements
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+ITALIC_RE = re.compile(r"_(.+?)_")
+INLINE_CODE_RE = re.compile(r"`(.+?)`")
+
+# Images and links; the url is matched separately because it may contain
+# balanced parentheses
+IMAGE_OPEN_RE = re.compile(r"!\[(.*?)\]\(")
+LINK_OPEN_RE = re.compile(r"(?<!!)\[(.*?)\]\(")
+PAREN_RE = re.compile(r"[()]")
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import zlib
+
+GZIP_SUFFIX = ".gz"
+MANIFEST_NAME = ".gzip-manifest.json"
+DEFAULT_LEVEL = 9
+READ_SIZE = 1 << 16
+
+# Files worth precompressing; images, fonts and archives are already
+# compressed and only get bigger
+COMPRESSIBLE_SUFFIXES = {
+    ".html",
+    ".htm",
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".svg",
+    ".xml",
+    ".txt",
+    ".md",
+    ".map",
+}
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_SUFFIXES
+
+
+def gzip_compressor(level):
+    # wbits 31 writes a gzip container; zlib leaves the header's mtime and
+    # file name empty, so the same content always compresses to the same
+    # bytes
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+class Precompressor:
+    """
+    Writes .gz siblings next to generated pages and copied files, for
+    servers that serve precompressed files (nginx gzip_static, CDNs).
+
+    A manifest in the output directory records the content hash and level
+    each .gz was made from, so a file is only recompressed when its content
+    or the level changes. Call save() once the build is done.
+    """
+
+    def __init__(self, dest_dir, level=DEFAULT_LEVEL):
+        if not 0 <= level <= 9:
+            raise ValueError("gzip level must be between 0 and 9")
+        self.dest_dir = dest_dir
+        self.level = level
+        self.compressed = 0
+        self.skipped = 0
+        self.manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as fp:
+                self.manifest = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            self.manifest = {}
+
+    def save(self):
+        os.makedirs(self.dest_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        data = json.dumps(self.manifest, indent=2, sort_keys=True)
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(data)
+        os.replace(tmp_path, self.manifest_path)
+
+    def key(self, path):
+        """Manifest key of path: its path relative to the output directory."""
+        return os.path.relpath(path, self.dest_dir).replace(os.sep, "/")
+
+    def _is_current(self, path, digest):
+        entry = self.manifest.get(self.key(path))
+        return (
+            entry is not None
+            and entry["sha256"] == digest
+            and entry["level"] == self.level
+            and os.path.exists(path + GZIP_SUFFIX)
+        )
+
+    def _record(self, path, digest):
+        self.manifest[self.key(path)] = {"sha256": digest, "level": self.level}
+
+    def write_page(self, node, path):
+        """
+        Stream node's HTML into path and its .gz sibling. A page without a
+        manifest entry is compressed on the fly as its chunks are written;
+        one with an entry is hashed while written and only recompressed if
+        the hash changed.
+        """
+        digest = hashlib.sha256()
+        if self.manifest.get(self.key(path)) is None:
+            compressor = gzip_compressor(self.level)
+            gz_tmp = path + GZIP_SUFFIX + ".tmp"
+            with open(path, "wb") as fp, open(gz_tmp, "wb") as gz:
+                for chunk in node.iter_html():
+                    fp.write(chunk)
+                    digest.update(chunk)
+                    gz.write(compressor.compress(chunk))
+                gz.write(compressor.flush())
+            os.replace(gz_tmp, path + GZIP_SUFFIX)
+            self.compressed += 1
+            self._record(path, digest.hexdigest())
+            return True
+        with open(path, "wb") as fp:
+            for chunk in node.iter_html():
+                fp.write(chunk)
+                digest.update(chunk)
+        return self._compress_if_changed(path, digest.hexdigest())
+
+    def compress_file(self, path, digest=None):
+        """
+        Write path's .gz sibling if its type is compressible and its content
+        changed since the last build. Returns whether it was compressed.
+        digest is path's sha256, for callers that already know it.
+        """
+        if not is_compressible(path):
+            return False
+        return self._compress_if_changed(path, digest or file_sha256(path))
+
+    def _compress_if_changed(self, path, digest):
+        if self._is_current(path, digest):
+            self.skipped += 1
+            return False
+        compressor = gzip_compressor(self.level)
+        gz_tmp = path + GZIP_SUFFIX + ".tmp"
+        with open(path, "rb") as src, open(gz_tmp, "wb") as gz:
+            while chunk := src.read(READ_SIZE):
+                gz.write(compressor.compress(chunk))
+            gz.write(compressor.flush())
+        os.replace(gz_tmp, path + GZIP_SUFFIX)
+        self.compressed += 1
+        self._record(path, digest)
+        return True
+
+    def forget(self, path):
+        """Drop path's .gz sibling and manifest entry, for deleted files."""
+        self.manifest.pop(self.key(path), None)
+        try:
+            os.remove(path + GZIP_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Drop every .gz in the manifest and the manifest itself."""
+        for key in list(self.manifest):
+            self.forget(os.path.join(self.dest_dir, *key.split("/")))
+        try:
+            os.remove(self.manifest_path)
+        except FileNotFoundError:
+            pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,242 @@
+import errno
+import json
+import os
+import shutil
+from collections import namedtuple
+
+from precompress import file_sha256, is_compressible
+
+STATIC_MANIFEST_NAME = ".static-manifest.json"
+
+# Errors meaning "this kind of copy isn't possible here", after which the
+# next, more portable way is tried
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EPERM,
+    errno.EBADF,
+}
+
+SyncReport = namedtuple(
+    "SyncReport", ["copied", "skipped", "removed", "copied_bytes", "skipped_bytes"]
+)
+
+
+def _kernel_copy(src_fd, dst_fd, size):
+    """
+    Copy size bytes between two files without passing them through Python:
+    copy_file_range (which can clone extents on CoW filesystems), then
+    sendfile. Returns False if neither works for this pair of files.
+    """
+    for name in ("copy_file_range", "sendfile"):
+        copy = getattr(os, name, None)
+        if copy is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if name == "copy_file_range":
+                    sent = copy(src_fd, dst_fd, size - offset)
+                else:
+                    sent = copy(dst_fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            # Half a copy can't be finished another way
+            if offset or e.errno not in _UNSUPPORTED:
+                raise
+            continue
+        return True
+    return False
+
+
+def copy_file(src, dst):
+    """
+    Copy src to dst, with its mtime. dst is replaced rather than written
+    over, which keeps a hardlinked dst from writing through to its source.
+    """
+    tmp_path = dst + ".tmp"
+    with open(src, "rb") as fsrc, open(tmp_path, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        if not _kernel_copy(fsrc.fileno(), fdst.fileno(), size):
+            shutil.copyfileobj(fsrc, fdst)
+    shutil.copystat(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def link_or_copy(src, dst):
+    """Hardlink src at dst, or copy it where the filesystem won't link."""
+    tmp_path = dst + ".tmp"
+    # os.link won't replace one left over from an interrupted sync
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp_path)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED and e.errno != errno.EMLINK:
+            raise
+        copy_file(src, dst)
+    else:
+        os.replace(tmp_path, dst)
+
+
+def scan_files(root):
+    """
+    Yield (relative path, path, stat) for every file under root, in sorted
+    order, statting through os.scandir.
+    """
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except FileNotFoundError:
+            continue
+        subdirs = []
+        for entry in entries:
+            relative = os.path.join(relative_dir, entry.name)
+            if entry.is_dir():
+                subdirs.append(relative)
+            elif entry.is_file():
+                yield relative, entry.path, entry.stat()
+        pending.extend(reversed(subdirs))
+
+
+class StaticSync:
+    """
+    Mirrors a static directory into the output directory, copying only
+    what changed.
+
+    A manifest in the output directory records the size and mtime of every
+    file synced. A file whose size and mtime match is skipped without being
+    read; one whose stat changed is hashed and only copied if its content
+    did. Hashes are recorded once computed, not on the first copy, which
+    would mean reading every file of a fresh build twice. Files synced
+    before that are no longer in the static directory are deleted from the
+    output.
+    """
+
+    def __init__(self, dest_dir, precompressor=None, link=False):
+        self.dest_dir = dest_dir
+        self.precompressor = precompressor
+        self.link = link
+        self.manifest_path = os.path.join(dest_dir, STATIC_MANIFEST_NAME)
+        try:
+            with open(self.manifest_path, encoding="utf-8") as fp:
+                self.manifest = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            self.manifest = {}
+
+    def save(self):
+        tmp_path = self.manifest_path + ".tmp"
+        data = json.dumps(self.manifest, indent=2, sort_keys=True)
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(data)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _check(self, key, path, st, target):
+        """
+        Return (current, digest): whether target is up to date with path,
+        and path's content hash if it had to be computed, else None.
+        """
+        entry = self.manifest.get(key)
+        try:
+            target_size = os.stat(target).st_size
+        except FileNotFoundError:
+            target_size = None
+        if entry is None or target_size != st.st_size:
+            return False, None
+        if entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return True, entry["sha256"]
+        # Touched or rewritten: only the content decides, compared against
+        # the copy in the output if its hash isn't known yet
+        digest = file_sha256(path)
+        synced = entry["sha256"] or file_sha256(target)
+        return digest == synced, digest
+
+    def sync(self, static_dir, generated=()):
+        """
+        Sync static_dir (which may be None or missing, meaning no files)
+        into the output directory, except for paths in generated, relative
+        to the output directory, which belong to generated pages. Returns a
+        SyncReport.
+        """
+        generated = {path.replace(os.sep, "/") for path in generated}
+        copied = skipped = copied_bytes = skipped_bytes = 0
+        seen = set()
+        made_dirs = set()
+        files = scan_files(static_dir) if static_dir else ()
+        for relative, path, st in files:
+            key = relative.replace(os.sep, "/")
+            if key in generated:
+                continue
+            seen.add(key)
+            target = os.path.join(self.dest_dir, relative)
+            current, digest = self._check(key, path, st, target)
+            if not current:
+                target_dir = os.path.dirname(target)
+                if target_dir not in made_dirs:
+                    os.makedirs(target_dir, exist_ok=True)
+                    made_dirs.add(target_dir)
+                if self.link:
+                    link_or_copy(path, target)
+                else:
+                    copy_file(path, target)
+                copied += 1
+                copied_bytes += st.st_size
+            else:
+                skipped += 1
+                skipped_bytes += st.st_size
+            if self.precompressor is not None and is_compressible(target):
+                # The precompressor needs the hash; work it out here once
+                # and record it, so later builds skip the file unread
+                if digest is None:
+                    digest = file_sha256(target)
+                self.precompressor.compress_file(target, digest)
+            self.manifest[key] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": digest,
+            }
+
+        removed = 0
+        for key in sorted(set(self.manifest) - seen):
+            del self.manifest[key]
+            if key in generated:
+                # A page now lives at this path; it isn't ours to delete
+                continue
+            target = os.path.join(self.dest_dir, *key.split("/"))
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+            if self.precompressor is not None:
+                self.precompressor.forget(target)
+            removed += 1
+            _remove_empty_dirs(os.path.dirname(target), self.dest_dir)
+        return SyncReport(copied, skipped, removed, copied_bytes, skipped_bytes)
+
+
+def _remove_empty_dirs(directory, root):
+    root = os.path.abspath(root)
+    directory = os.path.abspath(directory)
+    while directory != root and directory.startswith(root):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def sync_static(static_dir, dest_dir, precompressor=None, generated=(), link=False):
+    """Sync static_dir into dest_dir with a StaticSync and save its manifest."""
+    syncer = StaticSync(dest_dir, precompressor, link)
+    report = syncer.sync(static_dir, generated)
+    syncer.save()
+    return report
@@ -0,0 +1,144 @@
+import sys
+import unittest
+
+from arena import NONE, DocumentArena
+from blocknode import markdown_to_html_node
+from htmlnode import HTMLNode, LeafNode, ParentNode, SafeString
+
+
+class TestDocumentArena(unittest.TestCase):
+    def test_add_links_children(self):
+        document = DocumentArena()
+        root = document.add("ul", is_parent=True)
+        first = document.add("li", "one", parent=root)
+        second = document.add("li", "two", parent=root)
+        self.assertEqual(list(document.children(root)), [first, second])
+        self.assertEqual(document.parents[second], root)
+        self.assertEqual(document.next_sibling[second], NONE)
+        self.assertEqual(document.to_html(), "<ul><li>one</li><li>two</li></ul>")
+
+    def test_values_and_props_interned(self):
+        document = DocumentArena()
+        root = document.add("div", is_parent=True)
+        for _ in range(3):
+            document.add("a", "home", {"href": "/"}, parent=root)
+        self.assertEqual(len(document), 4)
+        self.assertEqual(document.strings, ["home", "href", "/"])
+        self.assertEqual(document.props(1), {"href": "/"})
+        self.assertIsNone(document.props(root))
+
+    def test_round_trip(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a < b "), LeafNode("b", "bold")]),
+                LeafNode("img", "", {"src": "x.png", "alt": 'say "hi"'}),
+                LeafNode(None, SafeString("<!-- kept -->")),
+            ],
+            {"class": "page"},
+        )
+        document = DocumentArena()
+        self.assertEqual(document.add_node(node), 0)
+        self.assertEqual(document.to_html(), node.to_html())
+        rebuilt = document.to_node()
+        self.assertEqual(rebuilt.to_html(), node.to_html())
+        self.assertIsInstance(rebuilt.children[2].value, SafeString)
+
+    def test_safe_and_plain_strings_kept_apart(self):
+        document = DocumentArena()
+        root = document.add("p", is_parent=True)
+        document.add(None, "<br>", parent=root)
+        document.add(None, SafeString("<br>"), parent=root)
+        self.assertEqual(document.to_html(), "<p>&lt;br&gt;<br></p>")
+
+    def test_leaf_without_value(self):
+        document = DocumentArena()
+        root = document.add("div", is_parent=True)
+        with self.assertRaises(ValueError):
+            document.add("p", parent=root)
+        self.assertEqual(len(document), 1)
+        document.add("br", parent=root)
+        self.assertEqual(document.to_html(root), "<div><br /></div>")
+
+    def test_non_string_value(self):
+        document = DocumentArena()
+        document.add_node(ParentNode("p", [LeafNode("b", 5)]))
+        self.assertEqual(document.to_html(), "<p><b>5</b></p>")
+
+    def test_custom_node_stored_as_html(self):
+        class Comment(HTMLNode):
+            def to_html(self):
+                return f"<!-- {self.value} -->"
+
+        node = ParentNode("div", [Comment(value="note")])
+        document = DocumentArena()
+        document.add_node(node)
+        self.assertEqual(document.to_html(), "<div><!-- note --></div>")
+
+    def test_subtree(self):
+        document = DocumentArena()
+        document.add_node(ParentNode("div", [ParentNode("p", [LeafNode("i", "x")])]))
+        self.assertEqual(document.to_html(1), "<p><i>x</i></p>")
+        self.assertEqual(document.to_html(2), "<i>x</i>")
+        self.assertEqual(document.to_node(1).to_html(), "<p><i>x</i></p>")
+
+    def test_bytes_round_trip(self):
+        document = DocumentArena()
+        root = document.add_node(
+            ParentNode(
+                "div",
+                [
+                    LeafNode("a", "a < b", {"href": "/"}),
+                    LeafNode(None, SafeString("<br>")),
+                    LeafNode(None, "<br>"),
+                ],
+            )
+        )
+        loaded = DocumentArena.from_bytes(document.to_bytes())
+        self.assertEqual(loaded.to_html(), document.to_html())
+        self.assertEqual(b"".join(loaded.iter_html()), document.to_html().encode())
+        # Still a working arena: interning and appending carry on
+        loaded.add(None, SafeString("<br>"), parent=root)
+        loaded.add("i", "x", parent=root)
+        self.assertEqual(len(loaded.strings), len(document.strings) + 1)
+        self.assertTrue(loaded.to_html().endswith("<br><i>x</i></div>"))
+
+    def test_from_bytes_rejects_other_data(self):
+        for data in [b"", b"not marshal", DocumentArena().to_bytes()[:-3]]:
+            with self.assertRaises(ValueError):
+                DocumentArena.from_bytes(data)
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        document = DocumentArena()
+        parent = NONE
+        for _ in range(depth):
+            parent = document.add("blockquote", parent=parent, is_parent=True)
+        document.add(None, "x", parent=parent)
+        html = "<blockquote>" * depth + "x" + "</blockquote>" * depth
+        self.assertEqual(document.to_html(), html)
+        self.assertEqual(document.to_node().to_html(), html)
+
+
+class TestMarkdownToArena(unittest.TestCase):
+    CASES = [
+        "",
+        "# Title\n\nSome **bold** and _italic_ text with `code`.",
+        "- one\n- [two](https://example.com)\n\n1. first\n2. second",
+        "> quoted\n> > nested\n\n![alt](img.png)",
+        "```\nx < y && z\n\nmore\n```\n\nFish & chips",
+        "Short\n\nwords\n\nA sentence.\n\n\nAnother one.",
+    ]
+
+    def test_same_html_as_nodes(self):
+        for markdown in self.CASES:
+            with self.subTest(markdown=markdown):
+                document = markdown_to_html_node(markdown, arena=True)
+                self.assertIsInstance(document, DocumentArena)
+                expected = markdown_to_html_node(markdown).to_html()
+                self.assertEqual(document.to_html(), expected)
+                self.assertEqual(document.to_node().to_html(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
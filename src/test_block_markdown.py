@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from block_markdown import markdown_to_blocks
+from block_markdown import iter_markdown_blocks, markdown_to_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -132,3 +133,54 @@ class TestMarkdownToBlocks(unittest.TestCase):
         self.assertEqual(
             blocks, ["- List item 1\n- Indented list item\n- Another list item"]
         )
+
+
+class TestIterMarkdownBlocks(unittest.TestCase):
+    MD = "# Title\n\nFirst paragraph\n  continues here\n\n\n- item one\n- item two\n"
+
+    def test_file_object(self):
+        blocks = list(iter_markdown_blocks(io.StringIO(self.MD)))
+        self.assertEqual(blocks, markdown_to_blocks(self.MD))
+
+    def test_bytes_lines(self):
+        lines = io.BytesIO(self.MD.encode("utf-8"))
+        self.assertEqual(list(iter_markdown_blocks(lines)), markdown_to_blocks(self.MD))
+
+    def test_yields_before_input_is_exhausted(self):
+        consumed = []
+
+        def lines():
+            for line in ["one", "", "two", "", "three"]:
+                consumed.append(line)
+                yield line
+
+        blocks = iter_markdown_blocks(lines())
+        self.assertEqual(next(blocks), "one")
+        self.assertEqual(consumed, ["one", ""])
+
+
+class TestFencedCodeBlocks(unittest.TestCase):
+    def test_blank_lines_inside_fence(self):
+        md = "Intro\n\n```\nfirst\n\nsecond\n```\n\nOutro"
+        self.assertEqual(
+            markdown_to_blocks(md), ["Intro", "```\nfirst\n\nsecond\n```", "Outro"]
+        )
+
+    def test_body_is_verbatim_relative_to_fence(self):
+        md = "    ```python\n    def f():\n        return 1  \n    ```\n"
+        self.assertEqual(
+            markdown_to_blocks(md), ["```python\ndef f():\n    return 1  \n```"]
+        )
+
+    def test_fence_interrupts_block(self):
+        md = "Regular paragraph.\n```\ncode\n```\nAfter"
+        self.assertEqual(
+            markdown_to_blocks(md), ["Regular paragraph.", "```\ncode\n```", "After"]
+        )
+
+    def test_unclosed_fence_runs_to_end(self):
+        self.assertEqual(markdown_to_blocks("```\na\n\nb"), ["```\na\n\nb\n```"])
+
+    def test_inline_backticks_line_is_not_a_fence(self):
+        md = "```code```\nmore\n\nnext"
+        self.assertEqual(markdown_to_blocks(md), ["```code```\nmore", "next"])
@@ -1,7 +1,14 @@
+import io
+import random
+import re
+import time
 import unittest
+from unittest import mock
 
-from blocknode import BlockType, block_to_block_type
-from blocknode import markdown_to_html_node
+import blocknode
+from blocknode import Block, BlockType, block_to_block_type
+from blocknode import classify_blocks, iter_markdown_html, track_and_manage_blocks
+from blocknode import markdown_to_html_node, parse_nested_elements
 
 
 class TestBlockToBlockType(unittest.TestCase):
@@ -87,6 +94,89 @@ class TestBlockToBlockType(unittest.TestCase):
         block = "  \n  \n  "
         self.assertEqual(block_to_block_type(block), None)
 
+    def test_marker_edge_cases(self):
+        self.assertEqual(block_to_block_type("#"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("###### \n"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("#######"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("``````"), BlockType.CODE)
+        self.assertEqual(block_to_block_type("```code```\n"), BlockType.CODE)
+        self.assertEqual(block_to_block_type("````"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("  * item"), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_to_block_type("-*-"), BlockType.UNORDERED_LIST)
+        self.assertEqual(block_to_block_type("--x"), BlockType.PARAGRAPH)
+
+    def test_matches_regex_classifier(self):
+        # The patterns block_to_block_type used before it dispatched on the
+        # first character
+        def regex_block_type(block):
+            if block.strip() == "":
+                return None
+            if re.match(r"^#{1,6}( |$)", block):
+                return BlockType.HEADING
+            if re.match(r"^```.*```$", block, re.DOTALL):
+                return BlockType.CODE
+            if re.match(r"^>.*", block, re.DOTALL):
+                return BlockType.QUOTE
+            if re.match(r"^(\s*[-\*](\s+.*)?(\n)?)+$", block, re.DOTALL):
+                return BlockType.UNORDERED_LIST
+            if all(
+                line.startswith(f"{i}. ") for i, line in enumerate(block.split("\n"), 1)
+            ):
+                return BlockType.ORDERED_LIST
+            return BlockType.PARAGRAPH
+
+        rng = random.Random(0)
+        pieces = ["-", "*", " ", "\t", "\n", "#", "`", "```", ">", "1. ", "2. ", "a"]
+        for _ in range(5000):
+            block = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+            with self.subTest(block=block):
+                self.assertEqual(block_to_block_type(block), regex_block_type(block))
+
+
+class TestBlockTypePathological(unittest.TestCase):
+    # Blocks that look like the start of a list, heading or fence but are
+    # not; each must still classify in time proportional to its length
+    BLOCKS = [
+        ("-" * 200_000 + "x", BlockType.PARAGRAPH),
+        ("*-" * 100_000 + "x", BlockType.PARAGRAPH),
+        ("-" + "\t-" * 100_000 + "!", BlockType.UNORDERED_LIST),
+        ("\n-" * 100_000 + "x", BlockType.UNORDERED_LIST),
+        ("#" * 200_000, BlockType.PARAGRAPH),
+        ("```" + "`" * 200_000 + "x", BlockType.PARAGRAPH),
+        ("1. a\n" * 50_000, BlockType.PARAGRAPH),
+        ("- " + "[error] stack frame\n" * 20_000, BlockType.UNORDERED_LIST),
+    ]
+
+    def test_time_bound(self):
+        for block, expected in self.BLOCKS:
+            with self.subTest(block=block[:20]):
+                start = time.perf_counter()
+                block_type = block_to_block_type(block)
+                elapsed = time.perf_counter() - start
+                self.assertEqual(block_type, expected)
+                self.assertLess(elapsed, 0.25)
+
+
+class TestClassifyBlocks(unittest.TestCase):
+    def test_records(self):
+        records = classify_blocks(["# Title", "Some  text\nhere", "   "])
+        self.assertEqual(
+            records,
+            [
+                Block(BlockType.HEADING, "# Title", None),
+                Block(BlockType.PARAGRAPH, "Some  text\nhere", "Some text here"),
+                Block(None, "   ", None),
+            ],
+        )
+
+    def test_classified_once_per_block(self):
+        blocks = ["Paragraph one", "two", "Another one.", "- item", "Last"]
+        with mock.patch(
+            "blocknode.block_to_block_type", wraps=blocknode.block_to_block_type
+        ) as classify:
+            track_and_manage_blocks(blocks)
+        self.assertEqual(classify.call_count, len(blocks))
+
 
 class TestMarkdownToHTMLNode(unittest.TestCase):
     def test_paragraphs(self):
@@ -149,6 +239,23 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_codeblock_escaped(self):
+        md = "```\nif a < b && b > c:\n    print('<p>')\n```"
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>if a &lt; b &amp;&amp; b &gt; c:\n"
+            "    print('&lt;p&gt;')\n</code></pre></div>",
+        )
+
+    def test_paragraph_text_escaped(self):
+        node = markdown_to_html_node("Fish & chips <b>not bold</b> and **x < y**")
+        self.assertEqual(
+            node.to_html(),
+            "<div><p>Fish &amp; chips &lt;b&gt;not bold&lt;/b&gt; and "
+            "<b>x &lt; y</b></p></div>",
+        )
+
     def test_headings(self):
         md = """
     # Main Heading
@@ -372,3 +479,58 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
             html,
             "<div><blockquote>This is a blockquote<blockquote>Nested blockquote here with <i>italic</i> text<blockquote>Even more nested with <b>bold</b> text</blockquote></blockquote></blockquote></div>",
         )
+
+
+class TestParseNestedElements(unittest.TestCase):
+    def test_bold_takes_priority(self):
+        # Bold is matched first even when italic text comes earlier
+        self.assertEqual(
+            repr(parse_nested_elements("_a_ **b**")),
+            "[LeafNode(i, a, None), LeafNode(None,  , None), "
+            "ParentNode(b, [LeafNode(None, b, None)], None)]",
+        )
+
+    def test_nested_spans(self):
+        self.assertEqual(
+            repr(parse_nested_elements("**x _y_ z** and `c`")),
+            "[ParentNode(b, [LeafNode(None, x , None), "
+            "ParentNode(i, [LeafNode(None, y, None)], None), "
+            "LeafNode(None,  z, None)], None), LeafNode(None,  and , None), "
+            "ParentNode(code, [LeafNode(None, c, None)], None)]",
+        )
+
+    def test_many_code_spans(self):
+        children = parse_nested_elements("text `code` " * 5000)
+        self.assertEqual(len(children), 10001)
+        self.assertEqual(children[1].tag, "code")
+        self.assertEqual(children[-1].value, " ")
+
+
+class TestIterMarkdownHTML(unittest.TestCase):
+    def test_matches_markdown_to_html_node(self):
+        docs = [
+            "",
+            "# Title\n\nSome **bold** text\n\n- one\n- two\n\n> quoted",
+            "Paragraph with  multiple   spaces  and\n\nnewlines",
+            "```\ncode here\n```\n\n1. first\n2. second",
+        ]
+        for md in docs:
+            with self.subTest(md=md):
+                self.assertEqual(
+                    "".join(iter_markdown_html(io.StringIO(md))),
+                    markdown_to_html_node(md).to_html(),
+                )
+
+    def test_renders_before_input_is_exhausted(self):
+        consumed = []
+
+        def lines():
+            for line in ["# One.", "", "Two.", "", "Three."]:
+                consumed.append(line)
+                yield line
+
+        chunks = iter_markdown_html(lines())
+        self.assertEqual(next(chunks), "<div>")
+        self.assertEqual(next(chunks), "<h1>One.</h1>")
+        # The lookahead block has been read, nothing after it
+        self.assertEqual(consumed, ["# One.", "", "Two.", ""])
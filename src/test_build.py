@@ -0,0 +1,267 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from build import build_site, extract_title, find_pages, format_report
+from main import main
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def read_tree(root):
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as fp:
+                files[os.path.relpath(path, root)] = fp.read()
+    return files
+
+
+class TestBuildSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "public")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello **world**.")
+        for i in range(6):
+            write(
+                os.path.join(self.content, "blog", f"post{i}.md"),
+                f"# Post {i}\n\n- item _{i}_\n- x < y",
+            )
+        write(os.path.join(self.content, "notes.txt"), "not a page")
+        write(os.path.join(self.static, "styles.css"), "body { margin: 0; }")
+        write(os.path.join(self.static, "index.html"), "<p>placeholder</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, dest, **kwargs):
+        return build_site(
+            self.content, os.path.join(self.root, dest), self.static, **kwargs
+        )
+
+    def test_find_pages(self):
+        self.assertEqual(
+            find_pages(self.content),
+            ["index.md"] + [f"blog/post{i}.md" for i in range(6)],
+        )
+        with self.assertRaises(FileNotFoundError):
+            find_pages(os.path.join(self.root, "missing"))
+
+    def test_build_pages_and_static(self):
+        report = self.build("dist", workers=1)
+        self.assertEqual((report.pages, report.assets.copied), (7, 1))
+        files = read_tree(os.path.join(self.root, "dist"))
+        self.assertEqual(
+            sorted(files),
+            [".build-manifest.json", ".static-manifest.json"]
+            + [f"blog/post{i}.html" for i in range(6)]
+            + ["index.html", "styles.css"],
+        )
+        index = files["index.html"].decode("utf-8")
+        # The generated page wins over the static file at the same path
+        self.assertIn("<title>Home</title>", index)
+        self.assertIn("<div><h1>Home</h1><p>Hello <b>world</b>.</p></div>", index)
+        self.assertIn("<li>x &lt; y</li>", files["blog/post3.html"].decode())
+
+    def test_template(self):
+        template = os.path.join(self.root, "template.html")
+        write(template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.build("dist", workers=1, template_path=template)
+        files = read_tree(os.path.join(self.root, "dist"))
+        self.assertEqual(
+            files["index.html"],
+            b"<title>Home</title><main><div><h1>Home</h1>"
+            b"<p>Hello <b>world</b>.</p></div></main>",
+        )
+
+    def test_output_independent_of_workers(self):
+        serial = self.build("serial", workers=1, gzip_level=6)
+        parallel = self.build("parallel", workers=3, chunk_size=1, gzip_level=6)
+        self.assertEqual(
+            read_tree(os.path.join(self.root, "serial")),
+            read_tree(os.path.join(self.root, "parallel")),
+        )
+        self.assertEqual(sum(w.pages for w in parallel.workers.values()), 7)
+        self.assertEqual(serial.size, parallel.size)
+
+    def test_report(self):
+        report = self.build("dist", workers=2)
+        lines = format_report(report)
+        self.assertTrue(lines[0].startswith("built 7 pages"))
+        self.assertEqual(len(lines), 3 + len(report.workers))
+
+    def test_incremental_rebuild(self):
+        self.build("dist", workers=1)
+        dest = os.path.join(self.root, "dist")
+        before = os.stat(os.path.join(dest, "index.html")).st_mtime_ns
+
+        report = self.build("dist", workers=1)
+        self.assertEqual((report.pages, report.skipped), (0, 7))
+        self.assertEqual(os.stat(os.path.join(dest, "index.html")).st_mtime_ns, before)
+
+        write(os.path.join(self.content, "blog", "post2.md"), "# Edited")
+        report = self.build("dist", workers=1)
+        self.assertEqual((report.pages, report.skipped), (1, 6))
+        with open(os.path.join(dest, "blog", "post2.html")) as fp:
+            self.assertIn("<h1>Edited</h1>", fp.read())
+
+        report = self.build("dist", workers=1, force=True)
+        self.assertEqual((report.pages, report.skipped), (7, 0))
+
+    def test_missing_output_rebuilt(self):
+        self.build("dist", workers=1)
+        os.remove(os.path.join(self.root, "dist", "blog", "post1.html"))
+        report = self.build("dist", workers=1)
+        self.assertEqual((report.pages, report.skipped), (1, 6))
+        report = self.build("dist", workers=1, gzip_level=6)
+        self.assertEqual(report.pages, 7)
+
+    def test_template_change_rebuilds_everything(self):
+        template = os.path.join(self.root, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        self.build("dist", workers=1, template_path=template)
+        report = self.build("dist", workers=1, template_path=template)
+        self.assertEqual(report.pages, 0)
+        write(template, "<body>{{ Content }}</body>")
+        report = self.build("dist", workers=1, template_path=template)
+        self.assertEqual(report.pages, 7)
+
+    def test_generator_change_rebuilds_everything(self):
+        self.build("dist", workers=1)
+        with mock.patch("build.generator_version", return_value="next"):
+            report = self.build("dist", workers=1)
+        self.assertEqual(report.pages, 7)
+
+    def test_deleted_source_removed(self):
+        self.build("dist", workers=1, gzip_level=6)
+        os.remove(os.path.join(self.content, "blog", "post4.md"))
+        report = self.build("dist", workers=1, gzip_level=6)
+        self.assertEqual((report.pages, report.removed), (0, 1))
+        files = read_tree(os.path.join(self.root, "dist"))
+        self.assertNotIn("blog/post4.html", files)
+        self.assertNotIn("blog/post4.html.gz", files)
+        self.assertIn("blog/post3.html.gz", files)
+
+    def test_broken_page(self):
+        write(os.path.join(self.content, "bad.md"), "a **b")
+        for workers in [1, 2]:
+            dest = f"dist{workers}"
+            report = self.build(dest, workers=workers, gzip_level=6)
+            self.assertEqual(report.pages, 7)
+            self.assertEqual([error.source for error in report.errors], ["bad.md"])
+            self.assertIn(
+                f"error: bad.md: {report.errors[0].message}", format_report(report)
+            )
+            files = read_tree(os.path.join(self.root, dest))
+            self.assertNotIn("bad.html", files)
+            self.assertIn("index.html.gz", files)
+            self.assertIn(".gzip-manifest.json", files)
+            # The good pages are recorded; the broken one is tried again
+            report = self.build(dest, workers=workers, gzip_level=6)
+            self.assertEqual((report.pages, report.skipped), (0, 7))
+            self.assertEqual(len(report.errors), 1)
+
+    def test_broken_page_deleted(self):
+        bad = os.path.join(self.content, "bad.md")
+        write(bad, "# Bad")
+        self.build("dist", workers=1, gzip_level=6)
+        write(bad, "broken **bold")
+        report = self.build("dist", workers=1, gzip_level=6)
+        self.assertEqual(len(report.errors), 1)
+        os.remove(bad)
+        report = self.build("dist", workers=1, gzip_level=6)
+        self.assertEqual((report.removed, report.errors), (1, []))
+        files = read_tree(os.path.join(self.root, "dist"))
+        self.assertNotIn("bad.html", files)
+        self.assertNotIn("bad.html.gz", files)
+
+    def test_main_broken_page(self):
+        write(os.path.join(self.content, "bad.md"), "a **b")
+        args = ["build", "--content", self.content, "--static", self.static]
+        args += ["--dest", os.path.join(self.root, "dist"), "--workers", "1"]
+        out = io.StringIO()
+        err = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            self.assertEqual(main(args + ["--no-cache"]), 1)
+        self.assertIn("built 7 pages", out.getvalue())
+        self.assertIn("error: bad.md: ", out.getvalue())
+        self.assertEqual(err.getvalue(), "error: 1 pages failed: bad.md\n")
+
+    def test_gzip_turned_off(self):
+        self.build("dist", workers=1, gzip_level=6)
+        self.build("dist", workers=1)
+        files = read_tree(os.path.join(self.root, "dist"))
+        self.assertEqual([path for path in files if path.endswith(".gz")], [])
+        self.assertNotIn(".gzip-manifest.json", files)
+        self.assertIn("styles.css", files)
+
+    def test_parse_cache(self):
+        cache_dir = os.path.join(self.root, "cache")
+        report = self.build("dist", workers=1, cache_dir=cache_dir)
+        self.assertEqual((report.cache_hits, report.cache_misses), (0, 7))
+        # A new template regenerates every page, but none is parsed again
+        template = os.path.join(self.root, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        report = self.build(
+            "dist", workers=2, template_path=template, cache_dir=cache_dir
+        )
+        self.assertEqual((report.pages, report.cache_hits), (7, 7))
+        self.assertIn("parse cache: 7 hits, 0 misses", format_report(report))
+        self.build("uncached", workers=1, template_path=template)
+        self.assertEqual(
+            read_tree(os.path.join(self.root, "dist")),
+            read_tree(os.path.join(self.root, "uncached")),
+        )
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            self.build("dist", workers=2, chunk_size=0)
+        with self.assertRaises(ValueError):
+            self.build("dist", workers=0)
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("text\n  # Title here \n", "x"), "Title here")
+        self.assertEqual(extract_title("## Sub\n#Not", "fallback"), "fallback")
+
+    def test_main_build(self):
+        out = io.StringIO()
+        dest = os.path.join(self.root, "dist")
+        args = ["build", "--content", self.content, "--dest", dest]
+        args += ["--static", self.static, "--workers", "1", "--gzip"]
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(args), 0)
+        self.assertIn("built 7 pages", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html.gz")))
+
+    def test_main_cache(self):
+        cache_dir = os.path.join(self.root, "cache")
+        args = ["build", "--content", self.content, "--static", self.static]
+        args += ["--dest", os.path.join(self.root, "dist"), "--workers", "1"]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(args + ["--cache-dir", cache_dir])
+            self.assertEqual(main(["cache", "stats", "--cache-dir", cache_dir]), 0)
+            main(["cache", "prune", "--cache-dir", cache_dir, "--cache-size", "0"])
+        self.assertIn(f"{cache_dir}: 7 entries", out.getvalue())
+        self.assertIn("removed 7 entries", out.getvalue())
+
+    def test_main_missing_content(self):
+        err = io.StringIO()
+        args = ["build", "--content", os.path.join(self.root, "missing")]
+        with contextlib.redirect_stderr(err):
+            self.assertEqual(main(args), 1)
+        self.assertIn("content directory not found", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,17 @@
+import gzip
+import io
+import sys
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import (
+    CHUNK_PARTS,
+    RENDER_CACHE_STATS,
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    SafeString,
+    escape_html,
+)
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -53,6 +64,30 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode("a", "blah blah blah blah", "", {})
         self.assertEqual(node.props_to_html(), "")
 
+    def test_props_html_cached(self):
+        node = HTMLNode("a", "x", None, {"href": "/", "title": 'say "hi"'})
+        html = node.props_to_html()
+        self.assertEqual(html, ' href="/" title="say &quot;hi&quot;"')
+        self.assertIs(node.props_to_html(), html)
+
+    def test_props_reassignment_invalidates(self):
+        node = LeafNode("a", "x", {"href": "/old"})
+        self.assertEqual(node.to_html(), '<a href="/old">x</a>')
+        node.props = {"href": "/new"}
+        self.assertEqual(node.to_html(), '<a href="/new">x</a>')
+        node.props = None
+        self.assertEqual(node.to_html(), "<a>x</a>")
+
+    def test_no_instance_dict(self):
+        for node in [
+            HTMLNode("p"),
+            LeafNode(None, "text"),
+            ParentNode("div", [LeafNode("b", "x")]),
+        ]:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
     def test_invalid_props_type(self):
         # Try to create HTMLNode with props as a list instead of dict
         with self.assertRaises(TypeError):
@@ -83,6 +118,39 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("img", None, {"src": "image.png", "alt": "An image"})
         self.assertEqual(node.to_html(), '<img src="image.png" alt="An image" />')
 
+    def test_value_escaped(self):
+        self.assertEqual(LeafNode(None, "a < b & c").to_html(), "a &lt; b &amp; c")
+        self.assertEqual(
+            LeafNode("code", "<br> & &amp;").to_html(),
+            "<code>&lt;br&gt; &amp; &amp;amp;</code>",
+        )
+
+    def test_quotes_not_escaped_in_text(self):
+        self.assertEqual(LeafNode("p", '"it\'s"').to_html(), '<p>"it\'s"</p>')
+
+    def test_safe_string_not_escaped(self):
+        self.assertEqual(
+            LeafNode(None, SafeString("<!-- kept -->")).to_html(), "<!-- kept -->"
+        )
+        self.assertEqual(
+            LeafNode("b", SafeString("&lt;&amp;")).to_html(), "<b>&lt;&amp;</b>"
+        )
+
+    def test_non_string_value(self):
+        self.assertEqual(LeafNode("b", 5).to_html(), "<b>5</b>")
+        self.assertEqual(LeafNode(None, 2.5).to_html(), "2.5")
+        self.assertEqual(
+            ParentNode("p", [LeafNode("b", 5), LeafNode(None, 0)]).to_html(),
+            "<p><b>5</b>0</p>",
+        )
+
+    def test_escape_html_once(self):
+        escaped = escape_html("1 < 2 & 3")
+        self.assertIsInstance(escaped, SafeString)
+        self.assertEqual(escaped, "1 &lt; 2 &amp; 3")
+        self.assertIs(escape_html(escaped), escaped)
+        self.assertEqual(LeafNode("i", escaped).to_html(), "<i>1 &lt; 2 &amp; 3</i>")
+
     def test_invalid_props_type_leaf(self):
         # Try to create LeafNode with props as a string
         with self.assertRaises(TypeError):
@@ -261,6 +329,34 @@ class TestParentNode(unittest.TestCase):
         node = ParentNode("div", children)
         result = node.to_html()  # Should complete in reasonable time
 
+    def test_trusted(self):
+        children = [LeafNode("b", "x"), LeafNode(None, "y")]
+        node = ParentNode.trusted("p", children, {"class": "c"})
+        self.assertIs(node.children, children)
+        self.assertEqual(node.to_html(), '<p class="c"><b>x</b>y</p>')
+        self.assertEqual(repr(node), repr(ParentNode("p", children, {"class": "c"})))
+        # The public constructor still validates
+        with self.assertRaises(ValueError):
+            ParentNode("p", [None])
+
+    def test_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode("p", "x")
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node])
+        html = node.to_html()
+        self.assertEqual(
+            html, "<blockquote>" * depth + "<p>x</p>" + "</blockquote>" * depth
+        )
+
+    def test_custom_child_rendered_by_itself(self):
+        class Comment(HTMLNode):
+            def to_html(self):
+                return f"<!-- {self.value} -->"
+
+        node = ParentNode("div", [Comment(value="note"), LeafNode("b", "x")])
+        self.assertEqual(node.to_html(), "<div><!-- note --><b>x</b></div>")
+
     # def test_inner_outer_props(self):
     #     node = ParentNode(
     #         "div",
@@ -270,5 +366,163 @@ class TestParentNode(unittest.TestCase):
     #     print(node.to_html())
 
 
+class TestStreamingHTML(unittest.TestCase):
+    def make_page(self, items):
+        return ParentNode(
+            "div",
+            [
+                ParentNode("h1", [LeafNode(None, "Café menu")]),
+                ParentNode(
+                    "ul",
+                    [
+                        ParentNode("li", [LeafNode("b", f"dish {i}")])
+                        for i in range(items)
+                    ],
+                ),
+            ],
+            {"class": "page"},
+        )
+
+    def test_chunks_join_to_html(self):
+        node = self.make_page(CHUNK_PARTS * 3)
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), node.to_html().encode("utf-8"))
+
+    def test_leaf_iter_html(self):
+        node = LeafNode("a", "link", {"href": "/"})
+        self.assertEqual(list(node.iter_html()), [b'<a href="/">link</a>'])
+
+    def test_encoding(self):
+        node = self.make_page(2)
+        html = b"".join(node.iter_html("utf-16-le"))
+        self.assertEqual(html.decode("utf-16-le"), node.to_html())
+
+    def test_encoding_with_bom(self):
+        node = self.make_page(CHUNK_PARTS * 3)
+        for encoding in ["utf-16", "utf-32", "utf-8-sig"]:
+            with self.subTest(encoding=encoding):
+                chunks = list(node.iter_html(encoding))
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(b"".join(chunks), node.to_html().encode(encoding))
+
+    def test_write_html(self):
+        node = self.make_page(100)
+        fp = io.BytesIO()
+        written = node.write_html(fp)
+        self.assertEqual(fp.getvalue(), node.to_html().encode("utf-8"))
+        self.assertEqual(written, len(fp.getvalue()))
+
+    def test_write_html_to_gzip(self):
+        node = self.make_page(100)
+        raw = io.BytesIO()
+        with gzip.GzipFile(fileobj=raw, mode="wb") as fp:
+            node.write_html(fp)
+        self.assertEqual(
+            gzip.decompress(raw.getvalue()), node.to_html().encode("utf-8")
+        )
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.leaf = LeafNode(None, "text")
+        self.inner = ParentNode("p", [LeafNode("b", "bold"), self.leaf])
+        self.root = ParentNode("div", [self.inner, LeafNode("i", "x")])
+        self.expected = self.root.to_html()
+        self.root.memoize_subtree()
+
+    def stats(self):
+        return RENDER_CACHE_STATS["hits"], RENDER_CACHE_STATS["misses"]
+
+    def test_second_render_hits(self):
+        hits, misses = self.stats()
+        self.assertEqual(self.root.to_html(), self.expected)
+        self.assertEqual(self.stats(), (hits, misses + 2))
+        self.assertEqual(self.root.to_html(), self.expected)
+        self.assertEqual(self.stats(), (hits + 1, misses + 2))
+
+    def test_unchanged_subtree_reused(self):
+        self.root.to_html()
+        self.root.props = {"id": "main"}
+        hits, misses = self.stats()
+        self.assertEqual(
+            self.root.to_html(),
+            '<div id="main"><p><b>bold</b>text</p><i>x</i></div>',
+        )
+        self.assertEqual(self.stats(), (hits + 1, misses + 1))
+
+    def test_memoizing_below_cached_ancestor(self):
+        leaf = LeafNode(None, "a")
+        p = ParentNode("p", [leaf])
+        root = ParentNode("div", [p], memoize=True)
+        self.assertEqual(root.to_html(), "<div><p>a</p></div>")
+        p.memoize_subtree(recursive=False)
+        leaf.value = "b"
+        self.assertEqual(root.to_html(), "<div><p>b</p></div>")
+
+    def test_invalidated_by_descendant_changes(self):
+        self.root.to_html()
+        self.leaf.value = "changed"
+        self.assertEqual(
+            self.root.to_html(), "<div><p><b>bold</b>changed</p><i>x</i></div>"
+        )
+        self.inner.tag = "section"
+        self.assertEqual(
+            self.root.to_html(),
+            "<div><section><b>bold</b>changed</section><i>x</i></div>",
+        )
+        self.inner.children = [LeafNode(None, "new")]
+        self.assertEqual(
+            self.root.to_html(), "<div><section>new</section><i>x</i></div>"
+        )
+        # Detached nodes no longer reach the tree
+        self.leaf.value = "gone"
+        hits, misses = self.stats()
+        self.root.to_html()
+        self.assertEqual(self.stats(), (hits + 1, misses))
+
+    def test_shared_subtree(self):
+        footer = ParentNode("footer", [LeafNode(None, "(c)")], memoize=True)
+        pages = [
+            ParentNode("div", [LeafNode("h1", str(i)), footer], memoize=True)
+            for i in range(2)
+        ]
+        self.assertEqual(
+            pages[0].to_html(), "<div><h1>0</h1><footer>(c)</footer></div>"
+        )
+        hits, misses = self.stats()
+        self.assertEqual(
+            pages[1].to_html(), "<div><h1>1</h1><footer>(c)</footer></div>"
+        )
+        self.assertEqual(self.stats(), (hits + 1, misses + 1))
+        footer.children[0].value = "(c) 2026"
+        for i, page in enumerate(pages):
+            self.assertEqual(
+                page.to_html(), f"<div><h1>{i}</h1><footer>(c) 2026</footer></div>"
+            )
+
+    def test_streaming_matches(self):
+        root = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode(None, str(i))])
+                for i in range(CHUNK_PARTS * 2)
+            ],
+        )
+        root.memoize_subtree()
+        expected = root.to_html().encode("utf-8")
+        self.assertEqual(b"".join(root.iter_html()), expected)
+        self.assertEqual(b"".join(root.iter_html()), expected)
+
+    def test_deep_memoized_tree(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode("p", "x")
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node], memoize=True)
+        html = "<blockquote>" * depth + "<p>x</p>" + "</blockquote>" * depth
+        self.assertEqual(node.to_html(), html)
+        self.assertEqual(node.to_html(), html)
+
+
 if __name__ == "__main__":
     unittest.main()
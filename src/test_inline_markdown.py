@@ -1,3 +1,4 @@
+import sys
 import unittest
 
 from textnode import TextNode, TextType
@@ -7,6 +8,8 @@ from inline_markdown import (
     split_nodes_link,
     extract_markdown_images,
     extract_markdown_links,
+    find_markdown_images,
+    find_markdown_links,
 )
 
 
@@ -170,6 +173,23 @@ class TestSplitNodes(unittest.TestCase):
         self.assertEqual(new_nodes3[0].text, "bold")
         self.assertEqual(new_nodes3[0].text_type, TextType.BOLD)
 
+    def test_many_delimiter_pairs(self):
+        # Far more pairs than the recursion limit allows nested calls for
+        count = sys.getrecursionlimit() * 5
+        node = TextNode("a **b** " * count + "end", TextType.TEXT)
+        new_nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
+        self.assertEqual(len(new_nodes), count * 2 + 1)
+        self.assertEqual(new_nodes[0], TextNode("a ", TextType.TEXT))
+        self.assertEqual(new_nodes[1], TextNode("b", TextType.BOLD))
+        self.assertEqual(new_nodes[2], TextNode(" a ", TextType.TEXT))
+        self.assertEqual(new_nodes[-1], TextNode(" end", TextType.TEXT))
+
+    def test_unmatched_after_many_pairs(self):
+        node = TextNode("`a` " * 2000 + "`dangling", TextType.TEXT)
+        with self.assertRaises(Exception) as context:
+            split_nodes_delimiter([node], "`", TextType.CODE)
+        self.assertTrue("Invalid Markdown Syntax" in str(context.exception))
+
 
 class TestExtractMarkdownImages(unittest.TestCase):
     # Test 1: Basic case - single image extraction
@@ -335,6 +355,34 @@ class TestExtractMarkdownImages(unittest.TestCase):
         )
 
 
+class TestFindMarkdownSpans(unittest.TestCase):
+    def test_image_offsets(self):
+        text = "An ![image](https://example.com/a(1).png) here"
+        spans = find_markdown_images(text)
+        self.assertListEqual([(3, 41, "image", "https://example.com/a(1).png")], spans)
+        start, end, _, _ = spans[0]
+        self.assertEqual(text[start:end], "![image](https://example.com/a(1).png)")
+
+    def test_link_offsets(self):
+        text = "![img](i.png) and [link](https://example.com)"
+        self.assertListEqual(
+            [(18, 45, "link", "https://example.com")], find_markdown_links(text)
+        )
+
+    def test_nested_url_span(self):
+        # The inner image is still reported, as extract_markdown_images does
+        self.assertListEqual(
+            [(0, 15, "a", "x ![b](y)"), (7, 14, "b", "y")],
+            find_markdown_images("![a](x ![b](y))"),
+        )
+
+    def test_many_unclosed_parens(self):
+        # Every candidate is unclosed; none may rescan the rest of the text
+        text = "[a](" * 50000 + "![b](" * 50000
+        self.assertListEqual([], find_markdown_links(text))
+        self.assertListEqual([], find_markdown_images(text))
+
+
 class TestSplitNodesImages(unittest.TestCase):
     def test_split_images(self):
         node = TextNode(
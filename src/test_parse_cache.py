@@ -0,0 +1,68 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from blocknode import markdown_to_html_node
+from parse_cache import ParseCache
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.tmp.name, version="v1")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, cache, markdown):
+        cache.store(digest(markdown), markdown_to_html_node(markdown))
+        return cache.path(digest(markdown))
+
+    def test_store_and_load(self):
+        markdown = "# Title\n\nSome **bold** & `a < b`\n\n- one\n- two"
+        self.assertIsNone(self.cache.load(digest(markdown)))
+        self.store(self.cache, markdown)
+        document = self.cache.load(digest(markdown))
+        self.assertEqual(document.to_html(), markdown_to_html_node(markdown).to_html())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_corrupt_entry_is_a_miss(self):
+        path = self.store(self.cache, "text")
+        with open(path, "wb") as fp:
+            fp.write(b"garbage")
+        self.assertIsNone(self.cache.load(digest("text")))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_versions_kept_apart(self):
+        self.store(self.cache, "text")
+        other = ParseCache(self.tmp.name, version="v2")
+        self.assertIsNone(other.load(digest("text")))
+        self.store(other, "more text")
+        stats = other.stats()
+        self.assertEqual((stats.entries, stats.stale), (2, 1))
+        self.assertGreater(stats.size, stats.stale_size)
+
+    def test_prune_evicts_least_recently_used(self):
+        paths = [self.store(self.cache, f"page {i}") for i in range(3)]
+        for age, path in enumerate(paths):
+            os.utime(path, (1000 + age, 1000 + age))
+        # Loading the oldest entry makes it the most recently used
+        self.cache.load(digest("page 0"))
+        # Same length sources, so same size entries
+        size = os.path.getsize(paths[0])
+        self.assertEqual(self.cache.prune(max_size=2 * size), (1, size))
+        self.assertEqual([os.path.exists(p) for p in paths], [True, False, True])
+
+    def test_empty_cache(self):
+        cache = ParseCache(os.path.join(self.tmp.name, "missing"))
+        self.assertEqual(tuple(cache.stats()), (0, 0, 0, 0))
+        self.assertEqual(cache.prune(0), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
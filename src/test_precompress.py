@@ -0,0 +1,103 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from precompress import MANIFEST_NAME, Precompressor
+
+
+def page(text):
+    return ParentNode("div", [ParentNode("p", [LeafNode(None, text)])])
+
+
+class TestPrecompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+        self.path = os.path.join(self.dest, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_gz(self, path):
+        with open(path + ".gz", "rb") as fp:
+            return gzip.decompress(fp.read())
+
+    def test_write_page(self):
+        compressor = Precompressor(self.dest, level=6)
+        self.assertTrue(compressor.write_page(page("hello"), self.path))
+        expected = b"<div><p>hello</p></div>"
+        with open(self.path, "rb") as fp:
+            self.assertEqual(fp.read(), expected)
+        self.assertEqual(self.read_gz(self.path), expected)
+        self.assertEqual(sorted(os.listdir(self.dest)), ["index.html", "index.html.gz"])
+
+    def test_unchanged_page_not_recompressed(self):
+        compressor = Precompressor(self.dest)
+        compressor.write_page(page("hello"), self.path)
+        compressor.save()
+        before = os.stat(self.path + ".gz").st_mtime_ns
+
+        compressor = Precompressor(self.dest)
+        self.assertFalse(compressor.write_page(page("hello"), self.path))
+        self.assertEqual(os.stat(self.path + ".gz").st_mtime_ns, before)
+        self.assertEqual((compressor.compressed, compressor.skipped), (0, 1))
+
+        self.assertTrue(compressor.write_page(page("changed"), self.path))
+        self.assertEqual(self.read_gz(self.path), b"<div><p>changed</p></div>")
+
+    def test_level_change_recompresses(self):
+        compressor = Precompressor(self.dest, level=1)
+        compressor.write_page(page("hello"), self.path)
+        compressor.save()
+        compressor = Precompressor(self.dest, level=9)
+        self.assertTrue(compressor.write_page(page("hello"), self.path))
+
+    def test_missing_gz_recompressed(self):
+        compressor = Precompressor(self.dest)
+        compressor.write_page(page("hello"), self.path)
+        os.remove(self.path + ".gz")
+        self.assertTrue(compressor.write_page(page("hello"), self.path))
+        self.assertTrue(os.path.exists(self.path + ".gz"))
+
+    def test_compress_file(self):
+        css = os.path.join(self.dest, "styles.css")
+        png = os.path.join(self.dest, "logo.png")
+        with open(css, "w") as fp:
+            fp.write("body { margin: 0; }\n" * 50)
+        with open(png, "wb") as fp:
+            fp.write(b"\x89PNG....")
+        compressor = Precompressor(self.dest)
+        self.assertTrue(compressor.compress_file(css))
+        self.assertFalse(compressor.compress_file(png))
+        self.assertFalse(compressor.compress_file(css))
+        self.assertFalse(os.path.exists(png + ".gz"))
+        self.assertEqual(self.read_gz(css), b"body { margin: 0; }\n" * 50)
+
+    def test_output_is_deterministic(self):
+        outputs = []
+        for _ in range(2):
+            compressor = Precompressor(self.dest)
+            compressor.write_page(page("same"), self.path)
+            with open(self.path + ".gz", "rb") as fp:
+                outputs.append(fp.read())
+            os.remove(self.path + ".gz")
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_forget(self):
+        compressor = Precompressor(self.dest)
+        compressor.write_page(page("hello"), self.path)
+        compressor.forget(self.path)
+        compressor.save()
+        self.assertFalse(os.path.exists(self.path + ".gz"))
+        self.assertEqual(Precompressor(self.dest).manifest, {})
+        self.assertTrue(os.path.exists(os.path.join(self.dest, MANIFEST_NAME)))
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            Precompressor(self.dest, level=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
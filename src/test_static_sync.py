@@ -0,0 +1,174 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import static_sync
+from precompress import Precompressor
+from static_sync import StaticSync, copy_file, sync_static
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+
+def read(path):
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "public")
+        self.dest = os.path.join(self.tmp.name, "dist")
+        write(os.path.join(self.static, "styles.css"), b"body { margin: 0; }")
+        write(os.path.join(self.static, "images", "logo.png"), b"\x89PNG" * 100)
+        write(os.path.join(self.static, "fonts", "a", "x.woff2"), b"font")
+        os.makedirs(self.dest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        report = sync_static(self.static, self.dest)
+        self.assertEqual(report.copied, 3)
+        self.assertEqual(report.copied_bytes, 19 + 400 + 4)
+        self.assertEqual(
+            read(os.path.join(self.dest, "images", "logo.png")), b"\x89PNG" * 100
+        )
+        self.assertEqual(
+            os.stat(os.path.join(self.dest, "styles.css")).st_mtime_ns,
+            os.stat(os.path.join(self.static, "styles.css")).st_mtime_ns,
+        )
+
+    def test_unchanged_files_skipped_without_hashing(self):
+        sync_static(self.static, self.dest)
+        with mock.patch.object(static_sync, "file_sha256") as file_sha256:
+            report = sync_static(self.static, self.dest)
+        file_sha256.assert_not_called()
+        self.assertEqual((report.copied, report.skipped), (0, 3))
+        self.assertEqual(report.skipped_bytes, 19 + 400 + 4)
+
+    def test_touched_file_hashed_not_copied(self):
+        sync_static(self.static, self.dest)
+        path = os.path.join(self.static, "styles.css")
+        os.utime(path, ns=(1, 1))
+        with mock.patch.object(static_sync, "copy_file") as copy:
+            report = sync_static(self.static, self.dest)
+        copy.assert_not_called()
+        self.assertEqual(report.skipped, 3)
+        # The new mtime is recorded, so the next sync doesn't hash it again
+        self.assertEqual(StaticSync(self.dest).manifest["styles.css"]["mtime_ns"], 1)
+
+    def test_changed_and_damaged_files_copied(self):
+        sync_static(self.static, self.dest)
+        write(os.path.join(self.static, "styles.css"), b"body { margin: 1px; }")
+        write(os.path.join(self.dest, "fonts", "a", "x.woff2"), b"truncated")
+        report = sync_static(self.static, self.dest)
+        self.assertEqual((report.copied, report.skipped), (2, 1))
+        self.assertEqual(
+            read(os.path.join(self.dest, "styles.css")), b"body { margin: 1px; }"
+        )
+        self.assertEqual(
+            read(os.path.join(self.dest, "fonts", "a", "x.woff2")), b"font"
+        )
+
+    def test_deleted_files_removed(self):
+        sync_static(self.static, self.dest)
+        write(os.path.join(self.dest, "fonts", "mine.txt"), b"not synced")
+        os.remove(os.path.join(self.static, "fonts", "a", "x.woff2"))
+        os.remove(os.path.join(self.static, "images", "logo.png"))
+        report = sync_static(self.static, self.dest)
+        self.assertEqual(report.removed, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "fonts", "a")))
+        # Files the sync never copied are left alone
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "fonts", "mine.txt")))
+
+        report = sync_static(None, self.dest)
+        self.assertEqual(report.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "styles.css")))
+
+    def test_generated_paths_left_to_pages(self):
+        write(os.path.join(self.static, "index.html"), b"placeholder")
+        sync_static(self.static, self.dest)
+        write(os.path.join(self.dest, "index.html"), b"page")
+        report = sync_static(self.static, self.dest, generated=["index.html"])
+        self.assertEqual(report.removed, 0)
+        self.assertEqual(read(os.path.join(self.dest, "index.html")), b"page")
+        self.assertNotIn("index.html", StaticSync(self.dest).manifest)
+
+    def test_hardlinks(self):
+        report = sync_static(self.static, self.dest, link=True)
+        self.assertEqual(report.copied, 3)
+        source = os.path.join(self.static, "styles.css")
+        target = os.path.join(self.dest, "styles.css")
+        self.assertEqual(os.stat(source).st_ino, os.stat(target).st_ino)
+        self.assertEqual(sync_static(self.static, self.dest, link=True).skipped, 3)
+
+        # Copying over a linked target replaces it instead of writing
+        # through into the source
+        other = os.path.join(self.tmp.name, "other.css")
+        write(other, b"p {}")
+        copy_file(other, target)
+        self.assertEqual(read(source), b"body { margin: 0; }")
+        self.assertEqual(read(target), b"p {}")
+
+    def test_hardlink_over_leftover_tmp(self):
+        write(os.path.join(self.dest, "styles.css.tmp"), b"interrupted")
+        report = sync_static(self.static, self.dest, link=True)
+        self.assertEqual(report.copied, 3)
+        self.assertEqual(
+            read(os.path.join(self.dest, "styles.css")), b"body { margin: 0; }"
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "styles.css.tmp")))
+
+    def test_precompressed_unchanged_files_not_read(self):
+        sync_static(self.static, self.dest, Precompressor(self.dest, level=6))
+        self.assertIsNotNone(StaticSync(self.dest).manifest["styles.css"]["sha256"])
+        with mock.patch.object(static_sync, "file_sha256") as sync_hash, mock.patch(
+            "precompress.file_sha256"
+        ) as precompress_hash:
+            report = sync_static(
+                self.static, self.dest, Precompressor(self.dest, level=6)
+            )
+        sync_hash.assert_not_called()
+        precompress_hash.assert_not_called()
+        self.assertEqual(report.skipped, 3)
+
+    def test_precompressed(self):
+        precompressor = Precompressor(self.dest, level=6)
+        sync_static(self.static, self.dest, precompressor)
+        gz = os.path.join(self.dest, "styles.css.gz")
+        self.assertEqual(gzip.decompress(read(gz)), b"body { margin: 0; }")
+        self.assertFalse(
+            os.path.exists(os.path.join(self.dest, "images", "logo.png.gz"))
+        )
+        os.remove(os.path.join(self.static, "styles.css"))
+        sync_static(self.static, self.dest, precompressor)
+        self.assertFalse(os.path.exists(gz))
+
+
+class TestCopyFile(unittest.TestCase):
+    def test_fallbacks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            data = os.urandom(300_000)
+            write(src, data)
+            for missing in [[], ["copy_file_range"], ["copy_file_range", "sendfile"]]:
+                with self.subTest(missing=missing), mock.patch.object(
+                    static_sync, "os", wraps=os
+                ) as patched:
+                    for name in missing:
+                        setattr(patched, name, None)
+                    dst = os.path.join(tmp, "dst")
+                    copy_file(src, dst)
+                    self.assertEqual(read(dst), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from textnode import TextNode, TextType
@@ -102,3 +103,72 @@ class TestTextToTextNodes(unittest.TestCase):
         # Our current implementation should treat this as separate markers
         assert len(nodes) > 1
         # We're not asserting exact behavior since it depends on your implementation
+
+
+class TestLexerCompat(unittest.TestCase):
+    # Inputs taken from this file and from test_inline_markdown.py
+    CASES = [
+        "This is **text** with an _italic_ word and a `code block` and an ![image](https://example.com/img.png) and a [link](https://example.com)",
+        "",
+        "Just plain text",
+        "**Bold text only**",
+        "_Italic text only_",
+        "`Code text only`",
+        "![Alt text](https://example.com/image.jpg)",
+        "[Link text](https://example.com)",
+        "**Bold1** plain text **Bold2**",
+        "This **has _nested_ formatting**",
+        "This is text with a `code block` word",
+        "This is text with some **very bold** words",
+        "This is text with an _italic_ word",
+        "**one** **two**",
+        "Hello ** ** today",
+        "Hello `   ` today",
+        "**bold** text",
+        "text **bold**",
+        "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and another ![second image](https://i.imgur.com/3elNhQu.png)",
+        "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)",
+        "This is a malformed image syntax: ![alt](https://example.com/missing-parenthesis",
+        "![alt text](https://example.com/image(1).jpg)",
+        "![same](https://example.com/same.jpg) and again ![same](https://example.com/same.jpg)",
+        "Text![no space](https://example.com/nospace.jpg)more text",
+        "![first](https://example.com/1.jpg)![second](https://example.com/2.jpg)",
+        "![alt text]()",
+        "Line 1 with ![image1](https://example.com/1.jpg)\nLine 2 with ![image2](https://example.com/2.jpg)",
+        "![alt with \\[brackets\\]](https://example.com/image.jpg)",
+        "This has a ![bad image](https://example.com/bad.png and ![good image](https://example.com/good.png)",
+        "This has a [bad link](https://example.com/bad and [good link](https://example.com/good)",
+        "Check out [this link with spaces](https://example.com/path with spaces) and [another-one](https://example.com/path-with-dashes)",
+        "Before [](https://example.com/empty) after",
+        "This is a [link](https://example.com)**bold text**",
+        "![a](x ![b](y)) tail ![c](z)",
+    ]
+
+    def assertSameAsPipeline(self, text):
+        try:
+            expected = text_to_textnodes(text, compat=True)
+        except Exception as e:
+            with self.assertRaises(Exception) as context:
+                text_to_textnodes(text)
+            self.assertEqual(str(e), str(context.exception))
+            return
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_matches_pipeline(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                self.assertSameAsPipeline(text)
+
+    def test_unmatched_delimiter(self):
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("Hello **world")
+        self.assertTrue("Invalid Markdown Syntax" in str(context.exception))
+
+    def test_matches_pipeline_random(self):
+        # Dense mixes of markers exercise overlapping and malformed spans
+        rng = random.Random(0)
+        pieces = ["a", " ", "!", "[", "]", "(", ")", "**", "_", "`", "\n", "[l](u)"]
+        for _ in range(2000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            with self.subTest(text=text):
+                self.assertSameAsPipeline(text)
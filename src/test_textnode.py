@@ -59,6 +59,28 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Same text", TextType.LINK, url="http://abc.com")
         self.assertNotEqual(node, node2)
 
+    def test_hash_matches_eq(self):
+        node = TextNode("Same text", TextType.LINK, "http://xyz.com")
+        node2 = TextNode("Same text", TextType.LINK, url="http://xyz.com")
+        self.assertEqual(hash(node), hash(node2))
+        self.assertEqual(len({node, node2, TextNode("Same text", TextType.TEXT)}), 2)
+
+    def test_usable_as_dict_key(self):
+        cache = {TextNode("x", TextType.BOLD): "<b>x</b>"}
+        self.assertEqual(cache[TextNode("x", TextType.BOLD)], "<b>x</b>")
+
+    def test_immutable(self):
+        node = TextNode("text", TextType.TEXT)
+        with self.assertRaises(AttributeError):
+            node.text = "changed"
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+    def test_not_equal_to_tuple(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertNotEqual(node, ("text", TextType.TEXT, None))
+        self.assertFalse(node == ("text", TextType.TEXT, None))
+
 
 class TestTextNodeToHTML(unittest.TestCase):
     def test_text(self):
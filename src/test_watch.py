@@ -0,0 +1,232 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from build import build_site
+from watch import Changes, TreeWatcher, Watcher, merge_changes
+
+
+def write(path, text, mtime_ns=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as fp:
+        return fp.read()
+
+
+class TestTreeWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "content")
+        write(os.path.join(self.root, "index.md"), "# Home")
+        write(os.path.join(self.root, "notes.txt"), "ignored")
+        write(os.path.join(self.root, "blog", "a.md"), "a")
+        write(os.path.join(self.root, "blog", "b.md"), "b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_initial_scan(self):
+        watcher = TreeWatcher(self.root, ".md")
+        self.assertEqual(sorted(watcher.files), ["blog/a.md", "blog/b.md", "index.md"])
+        self.assertEqual(watcher.poll(), (set(), set()))
+
+    def test_created_and_deleted(self):
+        watcher = TreeWatcher(self.root, ".md")
+        write(os.path.join(self.root, "blog", "c.md"), "c")
+        os.remove(os.path.join(self.root, "index.md"))
+        self.assertEqual(watcher.poll(), ({"blog/c.md"}, {"index.md"}))
+        self.assertEqual(watcher.poll(), (set(), set()))
+
+    def test_written_in_place(self):
+        watcher = TreeWatcher(self.root, ".md")
+        write(os.path.join(self.root, "blog", "a.md"), "A", mtime_ns=10**9)
+        self.assertEqual(watcher.poll(), ({"blog/a.md"}, set()))
+        # Now hot: caught on every poll, even with no sweep at all
+        write(os.path.join(self.root, "blog", "a.md"), "A", mtime_ns=2 * 10**9)
+        self.assertEqual(watcher.poll(sweep=0), ({"blog/a.md"}, set()))
+
+    def test_sweep_reaches_every_file(self):
+        watcher = TreeWatcher(self.root, ".md")
+        write(os.path.join(self.root, "blog", "b.md"), "B", mtime_ns=10**9)
+        changed = set()
+        for _ in range(3):
+            changed |= watcher.poll(sweep=1)[0]
+        self.assertEqual(changed, {"blog/b.md"})
+
+    def test_directories_added_and_removed(self):
+        watcher = TreeWatcher(self.root, ".md")
+        write(os.path.join(self.root, "new", "deep", "x.md"), "x")
+        self.assertEqual(watcher.poll(), ({"new/deep/x.md"}, set()))
+        for name in ["a.md", "b.md"]:
+            os.remove(os.path.join(self.root, "blog", name))
+        os.rmdir(os.path.join(self.root, "blog"))
+        self.assertEqual(watcher.poll(), (set(), {"blog/a.md", "blog/b.md"}))
+        self.assertNotIn("blog", watcher.dirs)
+
+    def test_missing_root(self):
+        root = os.path.join(self.tmp.name, "public")
+        watcher = TreeWatcher(root)
+        self.assertEqual(watcher.poll(), (set(), set()))
+        write(os.path.join(root, "styles.css"), "body {}")
+        self.assertEqual(watcher.poll(), ({"styles.css"}, set()))
+
+
+class TestMergeChanges(unittest.TestCase):
+    def test_later_wins(self):
+        first = Changes({"a.md", "b.md"}, {"c.md"}, False, False)
+        second = Changes({"c.md"}, {"a.md"}, True, False)
+        self.assertEqual(
+            merge_changes(first, second),
+            Changes({"b.md", "c.md"}, {"a.md"}, True, False),
+        )
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "public")
+        self.dest = os.path.join(self.tmp.name, "dist")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        write(os.path.join(self.content, "blog", "a.md"), "# A")
+        write(os.path.join(self.static, "styles.css"), "body {}")
+        self.lines = []
+        self.watcher = Watcher(
+            self.content,
+            self.dest,
+            self.static,
+            workers=1,
+            gzip_level=6,
+            log=self.lines.append,
+        )
+        self.watcher.build_all()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def dest_path(self, *parts):
+        return os.path.join(self.dest, *parts)
+
+    def test_page_changes(self):
+        write(os.path.join(self.content, "blog", "a.md"), "# Changed")
+        write(os.path.join(self.content, "blog", "new.md"), "# New")
+        os.remove(os.path.join(self.content, "index.md"))
+        changes = self.watcher.poll()
+        self.assertEqual(
+            changes, Changes({"blog/a.md", "blog/new.md"}, {"index.md"}, False, False)
+        )
+        self.watcher.rebuild(changes)
+        self.assertIn("<h1>Changed</h1>", read(self.dest_path("blog", "a.html")))
+        self.assertIn("<h1>New</h1>", read(self.dest_path("blog", "new.html")))
+        self.assertTrue(os.path.exists(self.dest_path("blog", "new.html.gz")))
+        self.assertFalse(os.path.exists(self.dest_path("index.html")))
+        self.assertTrue(self.lines[-1].startswith("rebuilt 2 pages, removed 1"))
+
+        # The manifests stay in step: a full build has nothing left to do
+        report = build_site(
+            self.content, self.dest, self.static, workers=1, gzip_level=6
+        )
+        self.assertEqual((report.pages, report.skipped, report.removed), (0, 2, 0))
+        self.assertEqual(report.assets.copied, 0)
+
+    def test_static_change(self):
+        write(os.path.join(self.static, "app.js"), "run()")
+        changes = self.watcher.poll()
+        self.assertEqual(changes, Changes(set(), set(), True, False))
+        self.watcher.rebuild(changes)
+        self.assertEqual(read(self.dest_path("app.js")), "run()")
+        self.assertIn("synced static files (1 copied, 0 removed)", self.lines[-1])
+
+    def test_template_change_rebuilds_everything(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        self.watcher.template_path = template
+        self.watcher.build_all()
+        write(template, "<body>{{ Content }}</body>", mtime_ns=10**9)
+        changes = self.watcher.poll()
+        self.assertTrue(changes.template)
+        self.watcher.rebuild(changes)
+        self.assertTrue(read(self.dest_path("index.html")).startswith("<body>"))
+        self.assertTrue(read(self.dest_path("blog", "a.html")).startswith("<body>"))
+
+    def test_missing_template_reported(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        self.watcher.template_path = template
+        self.watcher.build_all()
+        manifest = self.watcher.manifest
+        os.remove(template)
+        changes = self.watcher.poll()
+        self.assertTrue(changes.template)
+        self.watcher.rebuild(changes)
+        self.assertTrue(self.lines[-1].startswith("error: "))
+        self.assertIn("template.html", self.lines[-1])
+        self.assertIs(self.watcher.manifest, manifest)
+
+        # Back again: rebuilt on the next poll
+        write(template, "<body>{{ Content }}</body>")
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertTrue(read(self.dest_path("index.html")).startswith("<body>"))
+
+    def test_failed_first_build_retried(self):
+        content = os.path.join(self.tmp.name, "later")
+        dest = os.path.join(self.tmp.name, "later-dist")
+        watcher = Watcher(content, dest, None, workers=1, log=self.lines.append)
+        watcher._build_all_logged()
+        self.assertIn("content directory not found", self.lines[-1])
+        # A page showing up builds the whole site, which never was
+        write(os.path.join(content, "index.md"), "# Later")
+        watcher.rebuild(watcher.poll())
+        self.assertIn("<h1>Later</h1>", read(os.path.join(dest, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(dest, ".build-manifest.json")))
+
+    def test_broken_page_reported(self):
+        write(os.path.join(self.content, "blog", "a.md"), "unclosed **bold")
+        self.watcher.rebuild(self.watcher.poll())
+        self.assertTrue(self.lines[-2].startswith("error: blog/a.md: "))
+        self.assertTrue(self.lines[-1].startswith("rebuilt 0 pages"))
+        # Left for the next build to retry, and to clean up if deleted
+        self.assertIsNone(self.watcher.manifest.built["blog/a.md"])
+        os.remove(os.path.join(self.content, "blog", "a.md"))
+        report = build_site(
+            self.content, self.dest, self.static, workers=1, gzip_level=6
+        )
+        self.assertEqual(report.removed, 1)
+        self.assertFalse(os.path.exists(self.dest_path("blog", "a.html")))
+
+    def test_run_until_stopped(self):
+        watcher = Watcher(
+            self.content,
+            self.dest,
+            self.static,
+            workers=1,
+            interval=0.005,
+            debounce=0.005,
+            log=self.lines.append,
+        )
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not any(line.startswith("watching") for line in self.lines):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.005)
+            write(os.path.join(self.content, "index.md"), "# Watched")
+            while "<h1>Watched</h1>" not in read(self.dest_path("index.html")):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.005)
+        finally:
+            watcher.stop()
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
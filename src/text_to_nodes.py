@@ -1,6 +1,7 @@
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from inline_markdown import (
+    lex_inline_markdown,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -9,7 +10,16 @@ from inline_markdown import (
 )
 
 
-def text_to_textnodes(text):
+def text_to_textnodes(text, compat=False):
+    """
+    Convert inline markdown text into a list of TextNodes.
+
+    The single-scan lexer is used by default. compat=True runs the original
+    image -> link -> bold -> italic -> code pipeline, which the lexer is
+    tested against and which stays available as the reference behaviour.
+    """
+    if not compat:
+        return lex_inline_markdown(text)
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_image(nodes)
     nodes = split_nodes_link(nodes)
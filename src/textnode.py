@@ -1,6 +1,8 @@
-from htmlnode import LeafNode
+from collections import namedtuple
 from enum import Enum
 
+from htmlnode import LeafNode
+
 
 class TextType(Enum):
     TEXT = "text"
@@ -11,21 +13,25 @@ class TextType(Enum):
     IMAGE = "image"
 
 
-class TextNode:
-    def __init__(self, text, text_type: TextType, url=None):
-        self.text = text
-        self.text_type = text_type
-        self.url = url
+class TextNode(namedtuple("TextNode", ["text", "text_type", "url"], defaults=[None])):
+    # Tuple-backed: no per-instance __dict__, cheap to create in the
+    # splitters, immutable and hashable, so nodes can be cache keys and
+    # set members
+    __slots__ = ()
 
     def __eq__(self, other):
+        # Only equal to other TextNodes, never to a plain tuple
         if isinstance(other, TextNode):
-            return (
-                self.text == other.text
-                and self.text_type == other.text_type
-                and self.url == other.url
-            )
+            return tuple.__eq__(self, other)
         return False
 
+    def __ne__(self, other):
+        return not self == other
+
+    # Defining __eq__ drops the inherited hash, so restore the tuple one,
+    # which agrees with __eq__
+    __hash__ = tuple.__hash__
+
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
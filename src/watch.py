@@ -0,0 +1,390 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+from build import (
+    DEFAULT_CHUNK_SIZE,
+    MARKDOWN_SUFFIX,
+    BuildManifest,
+    BuildSettings,
+    build_inputs,
+    build_page,
+    build_site,
+    format_report,
+    init_worker,
+    load_template,
+    page_dest,
+    remove_page,
+)
+from parse_cache import DEFAULT_MAX_SIZE, ParseCache
+from precompress import Precompressor
+from static_sync import sync_static
+
+DEFAULT_INTERVAL = 0.05
+DEFAULT_DEBOUNCE = 0.02
+# Files statted per poll on top of the directories and hot files, so a
+# full sweep of a big tree is spread over several polls
+SWEEP_SIZE = 1024
+# Recently changed files, statted on every poll
+HOT_FILES = 64
+
+# What a poll found. pages and removed are sets of source paths, static
+# and template whether anything in those changed
+Changes = namedtuple("Changes", ["pages", "removed", "static", "template"])
+
+
+def merge_changes(first, second):
+    """Combine two Changes, the second being the more recent."""
+    return Changes(
+        (first.pages | second.pages) - second.removed,
+        (first.removed | second.removed) - second.pages,
+        first.static or second.static,
+        first.template or second.template,
+    )
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class TreeWatcher:
+    """
+    Polls the files under root (ending in suffix) for changes, cheaply
+    enough to run many times a second on a big tree.
+
+    Statting every file on every poll costs milliseconds per thousand
+    files, so a poll only stats:
+    - every directory, whose mtime changes when a file in it is created,
+      deleted or replaced by rename (the way most editors save), and only
+      lists the directories that changed
+    - the files that changed recently, which are usually the ones being
+      edited
+    - the next SWEEP_SIZE files of a rolling sweep over all of them, which
+      catches files written in place
+    """
+
+    def __init__(self, root, suffix=""):
+        self.root = root
+        self.suffix = suffix
+        # relative directory -> [mtime_ns, set of its files' paths]
+        self.dirs = {}
+        # relative path -> (mtime_ns, size)
+        self.files = {}
+        # Recently changed paths, oldest first
+        self.hot = {}
+        self._sweep = []
+        self._add_tree("", set())
+
+    def _list(self, relative_dir):
+        """
+        Return (mtime_ns, {path: stat key}, [subdirectory]) for a directory,
+        or None if it doesn't exist.
+        """
+        path = os.path.join(self.root, relative_dir)
+        try:
+            # The mtime is read before listing, so a change made while
+            # listing shows up on the next poll
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        files = {}
+        subdirs = []
+        for entry in entries:
+            relative = os.path.join(relative_dir, entry.name)
+            if entry.is_dir():
+                subdirs.append(relative)
+            elif entry.name.endswith(self.suffix) and entry.is_file():
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[relative] = (st.st_mtime_ns, st.st_size)
+        return mtime, files, subdirs
+
+    def _add_tree(self, relative_dir, changed):
+        pending = [relative_dir]
+        while pending:
+            relative_dir = pending.pop()
+            listing = self._list(relative_dir)
+            if listing is None:
+                if relative_dir == "":
+                    # A missing root is watched for being created
+                    self.dirs[""] = [None, set()]
+                continue
+            mtime, files, subdirs = listing
+            self.dirs[relative_dir] = [mtime, set(files)]
+            self.files.update(files)
+            changed.update(files)
+            pending.extend(subdirs)
+
+    def _remove_tree(self, relative_dir, removed):
+        prefix = os.path.join(relative_dir, "")
+        for directory in [
+            d for d in self.dirs if d == relative_dir or d.startswith(prefix)
+        ]:
+            for path in self.dirs.pop(directory)[1]:
+                del self.files[path]
+                removed.add(path)
+
+    def _rescan(self, relative_dir, changed, removed):
+        listing = self._list(relative_dir)
+        if listing is None:
+            self._remove_tree(relative_dir, removed)
+            if relative_dir == "":
+                self.dirs[""] = [None, set()]
+            return
+        mtime, files, subdirs = listing
+        entry = self.dirs[relative_dir]
+        for path in entry[1] - files.keys():
+            del self.files[path]
+            removed.add(path)
+        for path, key in files.items():
+            if self.files.get(path) != key:
+                self.files[path] = key
+                changed.add(path)
+        self.dirs[relative_dir] = [mtime, set(files)]
+        for subdir in subdirs:
+            if subdir not in self.dirs:
+                self._add_tree(subdir, changed)
+
+    def poll(self, sweep=SWEEP_SIZE):
+        """Return the sets of paths changed and removed since the last poll."""
+        changed = set()
+        removed = set()
+        for relative_dir, (mtime, _) in list(self.dirs.items()):
+            if relative_dir not in self.dirs:
+                # Went with a parent rescanned earlier in this loop
+                continue
+            try:
+                current = os.stat(os.path.join(self.root, relative_dir)).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                current = None
+            if current != mtime:
+                self._rescan(relative_dir, changed, removed)
+
+        if not self._sweep:
+            self._sweep = list(self.files)
+        batch = list(self.hot) + self._sweep[-sweep:]
+        del self._sweep[-sweep:]
+        for path in batch:
+            old = self.files.get(path)
+            if old is None or path in changed:
+                continue
+            key = _stat_key(os.path.join(self.root, path))
+            if key == old:
+                continue
+            if key is None:
+                # Deleted since its directory was checked above
+                del self.files[path]
+                self.dirs[os.path.dirname(path)][1].discard(path)
+                removed.add(path)
+            else:
+                self.files[path] = key
+                changed.add(path)
+
+        for path in changed:
+            self.hot.pop(path, None)
+            self.hot[path] = True
+        while len(self.hot) > HOT_FILES:
+            del self.hot[next(iter(self.hot))]
+        return changed, removed
+
+
+class Watcher:
+    """
+    Keeps a site built: one full build, then polls the content, static
+    directory and template and rebuilds only what changed.
+
+    The process stays warm between rebuilds, so modules, compiled patterns,
+    the template and the manifests are loaded once, and a changed page is
+    rebuilt in this process rather than through a worker pool. Only a
+    template change rebuilds every page.
+    """
+
+    def __init__(
+        self,
+        content_dir="content",
+        dest_dir="dist",
+        static_dir="public",
+        template_path=None,
+        workers=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        gzip_level=None,
+        cache_dir=None,
+        cache_size=DEFAULT_MAX_SIZE,
+        link_static=False,
+        interval=DEFAULT_INTERVAL,
+        debounce=DEFAULT_DEBOUNCE,
+        log=print,
+    ):
+        self.content_dir = content_dir
+        self.dest_dir = dest_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.gzip_level = gzip_level
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.link_static = link_static
+        self.interval = interval
+        self.debounce = debounce
+        self.log = log
+        self.stop_event = threading.Event()
+        # Set by a full build that finished; until then every change
+        # retries one
+        self.manifest = None
+
+    def build_all(self):
+        """Build the whole site, then load what rebuilds need to stay warm."""
+        # Snapshot first: anything that changes during the build is then
+        # picked up by the next poll
+        self.content = TreeWatcher(self.content_dir, MARKDOWN_SUFFIX)
+        self.static = TreeWatcher(self.static_dir) if self.static_dir else None
+        self.template_key = self._template_key()
+        report = build_site(
+            self.content_dir,
+            self.dest_dir,
+            self.static_dir,
+            self.template_path,
+            workers=self.workers,
+            chunk_size=self.chunk_size,
+            gzip_level=self.gzip_level,
+            cache_dir=self.cache_dir,
+            cache_size=self.cache_size,
+            link_static=self.link_static,
+        )
+
+        template = load_template(self.template_path)
+        settings = BuildSettings(
+            self.content_dir, self.dest_dir, template, self.gzip_level, self.cache_dir
+        )
+        # Set this process up as a worker, for build_page
+        init_worker(settings)
+        self.manifest = BuildManifest(
+            self.dest_dir, build_inputs(template, self.gzip_level)
+        )
+        self.manifest.built.update(self.manifest.pages)
+        self.precompressor = None
+        if self.gzip_level is not None:
+            self.precompressor = Precompressor(self.dest_dir, self.gzip_level)
+        return report
+
+    def _build_all_logged(self):
+        """build_all, logging its report, or what stopped it."""
+        try:
+            report = self.build_all()
+        # An editor that saves by delete and rename leaves the template
+        # missing for a moment; the next change to it builds again
+        except Exception as e:
+            self.log(f"error: {e}")
+            return
+        for line in format_report(report):
+            self.log(line)
+
+    def _template_key(self):
+        if self.template_path is None:
+            return None
+        return _stat_key(self.template_path)
+
+    def poll(self):
+        """Return the Changes since the last poll, or None."""
+        pages, removed = self.content.poll()
+        static = False
+        if self.static is not None:
+            static = any(self.static.poll())
+        template_key = self._template_key()
+        template = template_key != self.template_key
+        self.template_key = template_key
+        if pages or removed or static or template:
+            return Changes(pages, removed, static, template)
+        return None
+
+    def settle(self, changes):
+        """
+        Wait until nothing has changed for the debounce period, so a burst
+        of saves (or a git checkout) is rebuilt once. Returns all changes.
+        """
+        while not self.stop_event.wait(self.debounce):
+            more = self.poll()
+            if more is None:
+                break
+            changes = merge_changes(changes, more)
+        return changes
+
+    def rebuild(self, changes):
+        """Rebuild what changes affect and log what was done."""
+        start = time.perf_counter()
+        if changes.template or self.manifest is None:
+            self._build_all_logged()
+            return
+
+        built = 0
+        for source in sorted(changes.pages):
+            dest = os.path.join(self.dest_dir, page_dest(source))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                result = build_page(source)
+            # A page saved half-edited can fail to parse in any number of
+            # ways; report it and keep watching
+            except Exception as e:
+                self.log(f"error: {source}: {e}")
+                self.manifest.failed(source)
+                continue
+            built += 1
+            self.manifest.record(source, result.sha256)
+            if self.precompressor is not None:
+                key = self.precompressor.key(dest)
+                self.precompressor.manifest[key] = result.gzip
+
+        for source in sorted(changes.removed):
+            self.manifest.forget(source)
+            remove_page(
+                os.path.join(self.dest_dir, page_dest(source)), self.precompressor
+            )
+
+        if changes.static:
+            generated = [os.path.normpath(page_dest(s)) for s in self.content.files]
+            assets = sync_static(
+                self.static_dir,
+                self.dest_dir,
+                self.precompressor,
+                generated,
+                self.link_static,
+            )
+        if self.precompressor is not None:
+            self.precompressor.save()
+        self.manifest.save()
+
+        summary = f"rebuilt {built} pages, removed {len(changes.removed)}"
+        if changes.static:
+            summary += (
+                f", synced static files ({assets.copied} copied, "
+                f"{assets.removed} removed)"
+            )
+        self.log(f"{summary} in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    def run(self):
+        """Build, then rebuild on changes until stop() or Ctrl-C."""
+        self._build_all_logged()
+        self.log(f"watching {self.content_dir} for changes")
+        try:
+            while not self.stop_event.wait(self.interval):
+                changes = self.poll()
+                if changes is not None:
+                    self.rebuild(self.settle(changes))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.cache_dir is not None:
+                ParseCache(self.cache_dir).prune(self.cache_size)
+
+    def stop(self):
+        self.stop_event.set()